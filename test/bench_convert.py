@@ -0,0 +1,171 @@
+"""
+Benchmarks for the conversion utilities (not part of the unit test run)
+run with: python -m test.bench_convert [benchmark names]
+"""
+import random
+import re
+import sys
+from datetime import datetime, timedelta, timezone
+
+from test.bench import best
+from ubercode.utils import convert
+
+# number of values converted by each benchmark
+VALUES = 200000
+# the strptime baseline is slow so the date benchmarks use fewer values
+DATE_VALUES = 20000
+
+
+# -------- to_bool / is_true --------
+def legacy_to_bool(value) -> bool:
+    """ the original list scanning convert.to_bool kept as the baseline """
+    if value in convert.FALSE_VALUES or str(value).lower() in convert.FALSE_VALUES:
+        return False
+    return bool(value)
+
+
+def legacy_is_true(value) -> bool:
+    """ the original list scanning convert.is_true kept as the baseline """
+    if value is not None:
+        if value in convert.TRUE_VALUES or str(value).lower() in convert.TRUE_VALUES:
+            return True
+    return False
+
+
+def bool_inputs(count: int = VALUES) -> dict:
+    """ typical request parameter / csv / db values """
+    rng = random.Random(7)
+    strings = ["y", "n", "Yes", "no", "TRUE", "false", "on", "off", "1", "0", "", "maybe", "t", "F"]
+    return {
+        'bool': [rng.random() < 0.5 for _ in range(count)],
+        'int': [rng.randint(0, 3) for _ in range(count)],
+        'str': [rng.choice(strings) for _ in range(count)],
+        'None': [None] * count,
+        'mixed': [rng.choice((True, False, None, 0, 1, 2, 0.0, 1.5, datetime(2024, 1, 1), *strings))
+                  for _ in range(count)],
+    }
+
+
+def bench_bool() -> None:
+    print(f"to_bool / is_true: list scans vs lookup tables ({VALUES} values)")
+    print(f"{'function':<10}{'input':<8}{'legacy s':>12}{'tables s':>12}{'speedup':>10}")
+    for label, legacy, function in (("to_bool", legacy_to_bool, convert.to_bool),
+                                    ("is_true", legacy_is_true, convert.is_true)):
+        for kind, values in bool_inputs().items():
+            assert list(map(legacy, values)) == list(map(function, values))
+            old = best(lambda: list(map(legacy, values)))
+            new = best(lambda: list(map(function, values)))
+            print(f"{label:<10}{kind:<8}{old:>12.3f}{new:>12.3f}{old / new:>9.1f}x")
+
+
+# -------- from_iso8601_compact --------
+def legacy_from_iso8601_compact(value, tz=timezone.utc):
+    """ the original regex substitution + strptime cascade kept as the baseline """
+    _value = value
+    if isinstance(value, str):
+        if len(value.strip()) == 0:
+            return None
+        conformed_timestamp = re.sub(r"[:]|([-](?!((\d{2}[:]\d{2})|(\d{4}))$))", "", value)
+        _value = None
+        for pattern in ("%Y%m%dT%H%M%S.%f%z", "%Y%m%dT%H%M%S.%f", "%Y%m%dT%H%M%S", "%Y%m%dT%H%M", "%Y%m%dT%H",
+                        "%Y%m%d"):
+            try:
+                _value = datetime.strptime(conformed_timestamp, pattern)
+                break
+            except ValueError:
+                pass
+        else:
+            raise ValueError(f"DateTime string [{value}] did not match an expected pattern.")
+    if tz and isinstance(_value, datetime) and not _value.tzinfo:
+        _value = _value.replace(tzinfo=tz)
+    return _value
+
+
+def iso8601_inputs(count: int = DATE_VALUES) -> dict:
+    """ compact timestamps (the common case) plus extended and date only strings """
+    rng = random.Random(7)
+    start = datetime(2020, 1, 1)
+    stamps = [start + timedelta(seconds=rng.randrange(5 * 365 * 86400), microseconds=rng.randrange(10 ** 6))
+              for _ in range(count)]
+    return {
+        'compact': [stamp.strftime("%Y%m%dT%H%M%S") for stamp in stamps],
+        'fraction+tz': [stamp.strftime("%Y%m%dT%H%M%S.%f") + rng.choice(("Z", "+0100", "-05:00")) for stamp in stamps],
+        'extended': [stamp.strftime("%Y-%m-%dT%H:%M:%S") for stamp in stamps],
+        'date': [stamp.strftime("%Y%m%d") for stamp in stamps],
+    }
+
+
+def bench_iso8601() -> None:
+    print(f"from_iso8601_compact: strptime cascade vs one pass parser ({DATE_VALUES} values)")
+    print(f"{'input':<14}{'legacy s':>12}{'parser s':>12}{'speedup':>10}")
+    for kind, values in iso8601_inputs().items():
+        assert list(map(legacy_from_iso8601_compact, values)) == list(map(convert.from_iso8601_compact, values))
+        old = best(lambda: list(map(legacy_from_iso8601_compact, values)))
+        new = best(lambda: list(map(convert.from_iso8601_compact, values)))
+        print(f"{kind:<14}{old:>12.3f}{new:>12.3f}{old / new:>9.1f}x")
+
+
+# -------- date parse cache --------
+def log_timestamps(count: int = VALUES, distinct: int = 2000) -> list:
+    """ event log style input: a few thousand distinct second resolution timestamps repeated many times """
+    rng = random.Random(7)
+    start = datetime(2024, 1, 1)
+    stamps = [(start + timedelta(seconds=second)).strftime(rng.choice(("%Y-%m-%dT%H:%M:%S", "%Y%m%dT%H%M%S")))
+              for second in range(distinct)]
+    return [rng.choice(stamps) for _ in range(count)]
+
+
+def bench_date_cache() -> None:
+    values = log_timestamps()
+    print(f"to_date: uncached vs DateCache ({VALUES} values, {len(set(values))} distinct)")
+    print(f"{'function':<22}{'uncached s':>12}{'cached s':>12}{'speedup':>10}{'hit rate':>10}")
+    for label, function in (("to_date", convert.to_date), ("from_iso8601_compact", convert.from_iso8601_compact),
+                            ("to_date_many", None)):
+        run = (lambda: convert.to_date_many(values)) if function is None else (lambda: list(map(function, values)))
+        expected = run()
+        old = best(run)
+        with convert.date_cache() as cache:
+            assert run() == expected
+            new = best(run)
+        print(f"{label:<22}{old:>12.3f}{new:>12.3f}{old / new:>9.1f}x{cache.stats()['hit_rate']:>10.3f}")
+
+
+# -------- parse_dates --------
+def bench_parse_dates() -> None:
+    rng = random.Random(7)
+    start = datetime(2020, 1, 1)
+    stamps = [start + timedelta(seconds=rng.randrange(5 * 365 * 86400)) for _ in range(VALUES)]
+    columns = {
+        'extended': [stamp.strftime("%Y-%m-%dT%H:%M:%S") for stamp in stamps],
+        'space': [stamp.strftime("%Y-%m-%d %H:%M:%S") for stamp in stamps],
+        'compact': [stamp.strftime("%Y%m%dT%H%M%S") for stamp in stamps],
+        'offset': [stamp.strftime("%Y-%m-%dT%H:%M:%S-05:00") for stamp in stamps],
+        'date': [stamp.strftime("%Y-%m-%d") for stamp in stamps],
+        'mixed': [stamp.strftime(rng.choice(("%Y-%m-%dT%H:%M:%S", "%Y%m%dT%H%M%S", ""))) for stamp in stamps],
+    }
+    print(f"parse_dates vs to_date per value / to_date_many ({VALUES} values)")
+    print(f"{'column':<10}{'to_date s':>12}{'many s':>12}{'parse s':>12}{'vs to_date':>12}{'vs many':>10}")
+    for kind, values in columns.items():
+        expected = [convert.to_date(value, none_to_now=False) for value in values]
+        assert convert.parse_dates(values) == expected
+        single = best(lambda: [convert.to_date(value, none_to_now=False) for value in values])
+        many = best(lambda: convert.to_date_many(values, none_to_now=False))
+        parsed = best(lambda: convert.parse_dates(values))
+        print(f"{kind:<10}{single:>12.3f}{many:>12.3f}{parsed:>12.3f}{single / parsed:>11.1f}x{many / parsed:>9.1f}x")
+
+
+def main(names) -> None:
+    for name in names or BENCHMARKS:
+        BENCHMARKS[name]()
+
+
+BENCHMARKS = {
+    'bool': bench_bool,
+    'iso8601': bench_iso8601,
+    'date_cache': bench_date_cache,
+    'parse_dates': bench_parse_dates,
+}
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
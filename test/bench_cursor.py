@@ -0,0 +1,66 @@
+"""
+Benchmarks for the cursor conversion utilities (not part of the unit test run)
+run with: python -m test.bench_cursor [rows]
+"""
+import sqlite3
+import sys
+import tracemalloc
+
+from test.bench import best
+from ubercode.utils import cursor
+
+ROWS = 200000
+
+
+def _connect(rows: int):
+    conn = sqlite3.connect(":memory:")
+    cur = conn.cursor()
+    cur.execute("create table bench(id INTEGER PRIMARY KEY, code TEXT, keyword TEXT, amount REAL, quantity INTEGER)")
+    cur.executemany("insert into bench values (?, ?, ?, ?, ?)",
+                    ((i, f"code{i}", f"keyword{i % 100}", i * 0.25, i % 7) for i in range(rows)))
+    conn.commit()
+    return conn
+
+
+def _measure(conn, function):
+    """ returns (seconds to convert, bytes retained per row) for converting the full table with function """
+    # fetch the raw rows first so only the conversion itself is measured
+    rows = conn.execute("select * from bench").fetchall()
+    rows_cursor = _RowsCursor(conn.execute("select * from bench limit 0").description, rows)
+    tracemalloc.start()
+    result = function(rows_cursor)
+    retained = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    # tracemalloc slows allocation down so the timing comes from separate runs without it
+    elapsed = best(lambda: function(_RowsCursor(rows_cursor.description, rows)))
+    # the list of results itself is the same for every format; report the per row object overhead
+    return elapsed, (retained - sys.getsizeof(result)) / len(rows)
+
+
+class _RowsCursor:
+    """ replays already fetched rows so the driver cost isn't part of the measurement """
+    def __init__(self, description, rows):
+        self.description = description
+        self._rows = rows
+
+    def fetchall(self):
+        return self._rows
+
+
+def main(rows: int = ROWS):
+    conn = _connect(rows)
+    # warm the row class caches so the first measurement isn't penalized
+    for function in (cursor.to_tuples, cursor.to_records, lambda c: cursor.to_records(c, mutable=False)):
+        function(conn.execute("select * from bench limit 1"))
+    print(f"{rows} rows x 5 columns")
+    print(f"{'format':<22}{'seconds':>10}{'bytes/row':>12}")
+    for label, function in (("to_dicts", cursor.to_dicts),
+                            ("to_tuples", cursor.to_tuples),
+                            ("to_records", cursor.to_records),
+                            ("to_records(frozen)", lambda c: cursor.to_records(c, mutable=False))):
+        elapsed, per_row = _measure(conn, function)
+        print(f"{label:<22}{elapsed:>10.3f}{per_row:>12.1f}")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else ROWS)
@@ -0,0 +1,208 @@
+"""
+Benchmarks for the json/xml data utilities (not part of the unit test run)
+run with: python -m test.bench_data [benchmark names]
+"""
+import json
+import re
+import subprocess
+import sys
+import tempfile
+import xml.etree.ElementTree as Etree
+from collections import defaultdict
+from pathlib import Path
+
+from test.bench import best
+from ubercode.utils import data
+from ubercode.utils.data import JSON
+from ubercode.utils.data import XML
+
+# size of the generated inputs for the ampersand encoding benchmark
+AMPERSAND_MB = 100
+# number of copies of the test.json people list in the json backend benchmark document
+JSON_COPIES = 20000
+# approximate size of the generated files for the memory mapped loading benchmark
+MMAP_MB = 100
+
+
+# -------- tree_to_dict --------
+def legacy_tree_to_dict(t: Etree) -> dict:
+    """ the original recursive XML.tree_to_dict kept as the baseline """
+    d = {t.tag: {} if t.attrib else None}
+    children = list(t)
+    if children:
+        dd = defaultdict(list)
+        for dc in map(legacy_tree_to_dict, children):
+            for k, v in dc.items():
+                dd[k].append(v)
+        d = {t.tag: {k: v[0] if len(v) == 1 else v for k, v in dd.items()}}
+    if t.attrib:
+        d[t.tag].update(('@' + k, v) for k, v in t.attrib.items())
+    if t.text:
+        text = t.text.strip()
+        if children or t.attrib:
+            if text:
+                d[t.tag]['#text'] = text
+        else:
+            d[t.tag] = text
+    return d
+
+
+def wide_tree(records: int = 20000) -> Etree.Element:
+    """ a typical feed: many records with a few attributes and leaf fields each """
+    root = Etree.Element("feed")
+    for i in range(records):
+        record = Etree.SubElement(root, "record", id=str(i))
+        for name in ("name", "code", "amount", "status"):
+            Etree.SubElement(record, name).text = f"{name} {i}"
+        for tag in range(3):
+            Etree.SubElement(record, "tag").text = f"tag{tag}"
+    return root
+
+
+def deep_tree(depth: int = 900, width: int = 20) -> Etree.Element:
+    """ a few long chains of nested elements (kept under the recursion limit so the legacy version can run) """
+    root = Etree.Element("root")
+    for branch in range(width):
+        node = Etree.SubElement(root, "branch", index=str(branch))
+        for level in range(depth):
+            node = Etree.SubElement(node, "level")
+            node.text = f" {level} "
+    return root
+
+
+def bench_tree_to_dict() -> None:
+    print("tree_to_dict: legacy recursive vs iterative")
+    print(f"{'tree':<12}{'elements':>10}{'legacy s':>12}{'iterative s':>14}{'speedup':>10}")
+    for label, tree in (("wide", wide_tree()), ("deep", deep_tree())):
+        assert legacy_tree_to_dict(tree) == XML.tree_to_dict(tree)
+        legacy = best(legacy_tree_to_dict, tree)
+        iterative = best(XML.tree_to_dict, tree)
+        elements = sum(1 for _ in tree.iter())
+        print(f"{label:<12}{elements:>10}{legacy:>12.3f}{iterative:>14.3f}{legacy / iterative:>9.1f}x")
+
+
+# -------- ampersand encoding --------
+def legacy_escape_ampersands(value: str) -> str:
+    """ the original per call compiled regex used by each loader """
+    regex = re.compile(r"&(?!amp;|lt;|gt;)")
+    return regex.sub("&amp;", value)
+
+
+def bench_ampersands() -> None:
+    record = '<record id="1"><name>Joe &amp; Sons & Co</name><note>&lt;none&gt;</note></record>\n'
+    plain = record.replace("&amp;", "and").replace(" & ", " and ").replace("&lt;none&gt;", "none")
+    count = AMPERSAND_MB * 1024 * 1024 // len(record)
+    with_ampersands = record * count
+    without_ampersands = plain * (AMPERSAND_MB * 1024 * 1024 // len(plain))
+    print(f"ampersand encoding on {AMPERSAND_MB} MB inputs")
+    print(f"{'input':<28}{'legacy s':>12}{'shared s':>12}{'speedup':>10}")
+    for label, value, legacy_value in (
+            ("str with ampersands", with_ampersands, with_ampersands),
+            ("str without ampersands", without_ampersands, without_ampersands),
+            ("bytes without ampersands", without_ampersands.encode(), without_ampersands),
+            ("bytes with ampersands", with_ampersands.encode(), with_ampersands)):
+        legacy = best(legacy_escape_ampersands, legacy_value)
+        shared = best(data.escape_ampersands, value)
+        print(f"{label:<28}{legacy:>12.3f}{shared:>12.3f}{legacy / shared:>9.1f}x")
+
+
+# -------- json backends --------
+def bench_json_backends() -> None:
+    fixture = json.loads((Path(__file__).resolve().parent / 'test.json').read_text())
+    document = {"people": fixture["people"] * JSON_COPIES}
+    text = json.dumps(document)
+    raw = text.encode('utf-8')
+    mb = len(raw) / (1024 * 1024)
+    print(f"json backends on a {mb:.1f} MB document ({len(document['people'])} test.json people)")
+    print(f"{'backend':<12}{'loads str MB/s':>16}{'loads bytes MB/s':>18}{'dumps MB/s':>12}")
+    for backend in data.available_json_backends():
+        codec = data.get_json_codec(backend)
+        assert codec.loads(raw) == document and json.loads(codec.dumps(document)) == document
+        loads_str = best(codec.loads, text)
+        loads_bytes = best(codec.loads, raw)
+        dumps = best(codec.dumps, document)
+        print(f"{backend:<12}{mb / loads_str:>16.1f}{mb / loads_bytes:>18.1f}{mb / dumps:>12.1f}")
+    # what JSON() picks by default
+    print(f"JSON() default backend: {JSON().codec.name}")
+
+
+# -------- memory mapped loading --------
+# loads one file in a fresh interpreter and prints its peak resident set size in MB (linux reports ru_maxrss in KB)
+_PEAK_RSS_SCRIPT = """
+import resource, sys
+from ubercode.utils.data import JSON, XML
+kind, path, threshold, encode, backend = sys.argv[1:]
+loader = JSON(encode_ampersands=encode == '1', backend=backend) if kind == 'json' else XML(encode_ampersands=encode == '1')
+(loader.from_json_file if kind == 'json' else loader.from_xml_file)(path, int(threshold))
+print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024)
+"""
+
+
+def _peak_rss(kind: str, path: str, threshold: int, encode_ampersands: bool, backend: str = 'json') -> float:
+    output = subprocess.run([sys.executable, "-c", _PEAK_RSS_SCRIPT, kind, path, str(threshold),
+                             "1" if encode_ampersands else "0", backend], check=True, capture_output=True, text=True)
+    return float(output.stdout)
+
+
+def bench_mmap() -> None:
+    fixture = json.loads((Path(__file__).resolve().parent / 'test.json').read_text())
+    person = json.dumps(fixture["people"][0]).replace("Jackson", "Jackson & Sons")
+    record = '<record id="1"><name>Joe &amp; Sons & Co</name><note>&lt;none&gt;</note></record>\n'
+    with tempfile.TemporaryDirectory() as folder:
+        json_path = str(Path(folder, "bench.json"))
+        xml_path = str(Path(folder, "bench.xml"))
+        with open(json_path, "w") as json_file:
+            json_file.write('{"people": [' + ",".join([person] * (MMAP_MB * 1024 * 1024 // len(person))) + "]}")
+        with open(xml_path, "w") as xml_file:
+            xml_file.write("<feed>" + record * (MMAP_MB * 1024 * 1024 // len(record)) + "</feed>")
+        print(f"peak RSS loading {MMAP_MB} MB files: read() vs memory mapped")
+        print(f"{'loader':<36}{'read MB':>10}{'mmap MB':>10}{'saved MB':>10}")
+        cases = [(f"json {backend}{' +ampersands' if encode else ''}", 'json', json_path, encode, backend)
+                 for backend in data.available_json_backends() for encode in (False, True)]
+        cases.append(("xml +ampersands", 'xml', xml_path, True, 'json'))
+        for label, kind, path, encode, backend in cases:
+            read = _peak_rss(kind, path, sys.maxsize, encode, backend)
+            mapped = _peak_rss(kind, path, 0, encode, backend)
+            print(f"{label:<36}{read:>10.0f}{mapped:>10.0f}{read - mapped:>10.0f}")
+
+
+# -------- parse cache --------
+def bench_parse_cache() -> None:
+    xml_text = Etree.tostring(wide_tree(), encoding='unicode')
+    fixture = json.loads((Path(__file__).resolve().parent / 'test.json').read_text())
+    json_text = json.dumps({"people": fixture["people"] * (JSON_COPIES // 10)})
+    print("ParseCache hits vs parsing every time")
+    print(f"{'source':<14}{'MB':>8}{'parse s':>12}{'hit s':>12}{'speedup':>10}")
+    with tempfile.TemporaryDirectory() as folder:
+        xml_path = str(Path(folder, "bench.xml"))
+        Path(xml_path).write_text(xml_text, encoding="utf-8")
+        cache = data.ParseCache()
+        cases = (
+            ("xml string", len(xml_text), lambda: XML(xml_text), lambda: XML(xml_text, cache=cache)),
+            ("xml file", len(xml_text), lambda: XML().from_xml_file(xml_path),
+             lambda: XML(cache=cache).from_xml_file(xml_path)),
+            ("json string", len(json_text), lambda: JSON(json_text), lambda: JSON(json_text, cache=cache)),
+        )
+        for label, size, parse, hit in cases:
+            assert hit().data is not None
+            parsed = best(parse)
+            cached = best(hit)
+            print(f"{label:<14}{size / (1024 * 1024):>8.1f}{parsed:>12.4f}{cached:>12.4f}{parsed / cached:>9.1f}x")
+
+
+def main(names) -> None:
+    for name in names or BENCHMARKS:
+        BENCHMARKS[name]()
+
+
+BENCHMARKS = {
+    'tree_to_dict': bench_tree_to_dict,
+    'ampersands': bench_ampersands,
+    'json_backends': bench_json_backends,
+    'mmap': bench_mmap,
+    'parse_cache': bench_parse_cache,
+}
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -1,8 +1,10 @@
 import os
+import threading
 import unittest
 from contextlib import redirect_stdout
 from io import StringIO
-from datetime import datetime, timezone
+from array import array
+from datetime import datetime, timedelta, timezone
 from random import choice
 from string import ascii_lowercase
 
@@ -204,6 +206,232 @@ class TestConvert(unittest.TestCase):
         # --------------
         self.assertEqual("2024-01-31T08:10:30+00:00", convert.to_iso8601(date))
 
+    def test_from_iso8601_compact(self):
+        """ Tests the one pass iso8601 parser """
+        utc = timezone.utc
+        expected = datetime(2024, 1, 31, 8, 10, 30, tzinfo=utc)
+        for value in ("20240131T081030", "2024-01-31T08:10:30", "20240131t081030Z", "2024-01-31T08:10:30+00:00",
+                      "2024W053T081030", "2024-W05-3T08:10:30", "2024031T081030", "2024-031T08:10:30"):
+            self.assertEqual(expected, convert.from_iso8601_compact(value), value)
+        self.assertEqual(datetime(2024, 1, 31, tzinfo=utc), convert.from_iso8601_compact("20240131"))
+        self.assertEqual(datetime(2024, 12, 31, tzinfo=utc), convert.from_iso8601_compact("2024-366"))
+        # hour and minute forms
+        self.assertEqual(datetime(2024, 1, 31, 15, 30, tzinfo=utc), convert.from_iso8601_compact("20240131T1530"))
+        self.assertEqual(datetime(2024, 1, 31, 15, tzinfo=utc), convert.from_iso8601_compact("20240131T15"))
+        # fractions and offsets
+        value = convert.from_iso8601_compact("20240131T081030.123-0130")
+        self.assertEqual(datetime(2024, 1, 31, 8, 10, 30, 123000, tzinfo=timezone(-timedelta(hours=1, minutes=30))),
+                         value)
+        self.assertEqual(timedelta(hours=-1, minutes=-30), value.utcoffset())
+        self.assertIs(utc, convert.from_iso8601_compact("20240131T081030.5+0000").tzinfo)
+        self.assertEqual(5, convert.from_iso8601_compact("2024-01-31T08:10:30,000005").microsecond)
+        # the tz is only applied to strings without an offset
+        local = timezone(timedelta(hours=2))
+        self.assertEqual(local, convert.from_iso8601_compact("20240131", tz=local).tzinfo)
+        self.assertEqual(utc, convert.from_iso8601_compact("20240131T08Z", tz=local).tzinfo)
+        self.assertIsNone(convert.from_iso8601_compact("20240131T0810", tz=None).tzinfo)
+        # single digit fields still work through the original strptime patterns
+        self.assertEqual(datetime(2024, 1, 31, tzinfo=utc), convert.from_iso8601_compact("2024-1-31"))
+        # blank strings are None, other values are returned as is and invalid dates raise a ValueError
+        self.assertIsNone(convert.from_iso8601_compact("  "))
+        self.assertEqual(5, convert.from_iso8601_compact(5))
+        for value in ("Not a Date!", "20240231", "2023366", "2024W54", "20240131T081030.1234567"):
+            with self.assertRaises(ValueError):
+                convert.from_iso8601_compact(value)
+        self.assertIsNone(convert.to_date("20240231"))
+        # a trailing newline isn't part of a date
+        for value in ("20240131\n", "20240131T081030\n", "2024-01-31T08:10:30.5\n", "2024W053\n"):
+            with self.assertRaises(ValueError):
+                convert.from_iso8601_compact(value)
+            self.assertIsNone(convert.to_date(value))
+
+    def test_bool_tables(self):
+        """ Tests the set based to_bool/is_true lookups match the original list scans """
+        def legacy_to_bool(value):
+            if value in convert.FALSE_VALUES or str(value).lower() in convert.FALSE_VALUES:
+                return False
+            return bool(value)
+
+        def legacy_is_true(value):
+            return value is not None and (value in convert.TRUE_VALUES or str(value).lower() in convert.TRUE_VALUES)
+
+        values = [None, True, False, 0, 1, 2, -1, 0.0, 1.0, 2.5, float("nan"), "", " ", "0", "1", "2", "Y", "yes",
+                  "No", "OFF", "on", "True", "None", "none", "ja", "Nein", "5", 5, 5.0, -3, "-3", [], [0], {},
+                  datetime.now(), b"", b"0"]
+        true_values, false_values = list(convert.TRUE_VALUES), list(convert.FALSE_VALUES)
+        try:
+            for _ in range(2):
+                for value in values:
+                    self.assertEqual(legacy_to_bool(value), convert.to_bool(value), repr(value))
+                    self.assertEqual(legacy_is_true(value), convert.is_true(value), repr(value))
+                # extra tokens are matched case insensitively once registered
+                convert.register_bool_tokens(true=["Ja", 5], false=["Nein", "-3"])
+                self.assertTrue(convert.is_true("JA") and convert.is_true(5) and convert.is_true(5.0))
+                self.assertFalse(convert.to_bool("nein") or convert.to_bool(-3))
+            # tokens that only look like ints are plain strings
+            convert.register_bool_tokens(false=["--3", "-", "007"])
+            self.assertFalse(convert.to_bool("--3") or convert.to_bool("007"))
+            self.assertTrue(convert.to_bool(7))
+            # registering a token twice doesn't add it twice
+            self.assertEqual(1, convert.TRUE_VALUES.count("ja"))
+            # lists changed directly are picked up after a rebuild
+            convert.FALSE_VALUES.append("nope")
+            self.assertTrue(convert.to_bool("nope"))
+            convert.register_bool_tokens()
+            self.assertFalse(convert.to_bool("nope"))
+        finally:
+            convert.TRUE_VALUES[:] = true_values
+            convert.FALSE_VALUES[:] = false_values
+            convert.register_bool_tokens()
+        self.assertTrue(convert.to_bool("ja"))
+        self.assertFalse(convert.is_true("ja"))
+
+    # -------- batch conversions --------
+    def test_batch_conversions(self):
+        """ Tests the batch conversions give the same results as the scalar functions """
+        values = [None, 0, 1, -7, "12", " 13 ", "1_000", "x", "", 1.9, True, False, {"x": 1}, "None", " none ",
+                  "y", "Yes", "OFF", "f", 0.0, float("nan"), datetime(2024, 1, 31, 8, 10, 30), "2024-01-31 08:10:30",
+                  "20240131T081030", "20240131", "Not a Date!", 2**70]
+        # --- to_int_many
+        for options in ({}, {"default": None}, {"default": 5, "none_to_default": False}, {"default": "bad"}):
+            expected = [convert.to_int(value, **options) for value in values]
+            self.assertEqual(expected, convert.to_int_many(values, **options))
+            # iterators work the same as sequences
+            self.assertEqual(expected, convert.to_int_many(iter(values), **options))
+        # warnings are still printed for each value
+        with redirect_stdout(StringIO()) as sout:
+            self.assertEqual([0, 0, 1], convert.to_int_many(["x", "y", "1"], suppress_warnings=False))
+        self.assertEqual(2, sout.getvalue().count("WARNING"))
+        self.assertEqual(array('q', [1, 0, 2]), convert.to_int_many(["1", "x", 2], output='array'))
+        with self.assertRaises(TypeError):
+            convert.to_int_many([None], none_to_default=False, output='array')
+        # --- to_bool_many
+        self.assertEqual([convert.to_bool(value) for value in values], convert.to_bool_many(values))
+        self.assertEqual(array('b', [1, 0, 0]), convert.to_bool_many(["yes", "no", None], output='array'))
+        # --- to_none_many
+        for options in ({}, {"values_to_convert": ["null", ""]}, {"strip_value": False}):
+            self.assertEqual([convert.to_none(value, **options) for value in values],
+                             convert.to_none_many(values, **options))
+        # --- to_date_many
+        for options in ({"none_to_now": False}, {"tz": None, "none_to_now": False}):
+            self.assertEqual([convert.to_date(value, **options) for value in values],
+                             convert.to_date_many(values, **options))
+        now = convert.to_date_many([None, None])
+        self.assertTrue(all(value.tzinfo == timezone.utc for value in now))
+        with self.assertRaises(ValueError):
+            convert.to_date_many(values, output='array')
+        with self.assertRaises(ValueError):
+            convert.to_int_many(values, output='tuple')
+        # numpy arrays are converted directly and numpy output is supported when numpy is installed
+        if convert.numpy is not None:
+            numbers = convert.numpy.array([0, 1, -3, 7])
+            self.assertEqual([0, 1, -3, 7], convert.to_int_many(numbers))
+            self.assertEqual([False, True, True, True], convert.to_bool_many(numbers))
+            self.assertEqual([1, 0], convert.to_int_many(["1", "x"], output='numpy').tolist())
+            self.assertEqual([1, None], convert.to_int_many(["1", None], none_to_default=False, output='numpy').tolist())
+        else:
+            with self.assertRaises(ImportError):
+                convert.to_int_many(values, output='numpy')
+
+    @unittest.skipIf(convert.numpy is None, "numpy is not installed")
+    def test_batch_numpy(self):
+        numpy = convert.numpy
+        arrays = [numpy.array([0, 1, -1, 5, 2]), numpy.array([0, 1, 5, 255], dtype=numpy.uint8),
+                  numpy.array([0.0, -0.0, 1.0, -1.0, 1.5, float("nan"), float("inf")]),
+                  numpy.array([0.5, 1.0], dtype=numpy.float32), numpy.array([True, False])]
+        true_values, false_values = list(convert.TRUE_VALUES), list(convert.FALSE_VALUES)
+        try:
+            # numpy arrays give the scalar results, including with registered false tokens
+            for tokens in ({}, {"false": ["-1"]}, {"false": [5, "nan", "1.5", True]}, {"false": [2.0, "inf"]}):
+                convert.register_bool_tokens(**tokens)
+                for values in arrays:
+                    expected = [convert.to_bool(value) for value in values.tolist()]
+                    self.assertEqual(expected, convert.to_bool_many(values), (tokens, values))
+                    result = convert.to_bool_many(values, output='numpy')
+                    self.assertEqual(numpy.bool_, result.dtype)
+                    self.assertEqual(expected, result.tolist())
+        finally:
+            convert.TRUE_VALUES[:] = true_values
+            convert.FALSE_VALUES[:] = false_values
+            convert.register_bool_tokens()
+        values = numpy.array([0, 1, -3, 7])
+        self.assertEqual([convert.to_int(value) for value in values.tolist()], convert.to_int_many(values))
+        self.assertEqual(numpy.int64, convert.to_int_many(values, output='numpy').dtype)
+
+    def test_date_cache(self):
+        values = ["20240131T153000", "2024-01-31 15:30:00", "20240131T153000", "", "not a date", "not a date"]
+        tz = timezone(timedelta(hours=-5))
+        expected = [convert.to_date(value, tz=tz) for value in values]
+        self.assertIsNone(convert.get_date_cache())
+        with convert.date_cache(maxsize=2) as cache:
+            self.assertIs(cache, convert.get_date_cache())
+            self.assertEqual(expected, [convert.to_date(value, tz=tz) for value in values])
+            self.assertEqual({'hits': 2, 'misses': 4, 'hit_rate': 2 / 6, 'size': 2}, cache.stats())
+            # the same string is cached separately per function and timezone
+            self.assertEqual(datetime(2024, 1, 31, 15, 30, tzinfo=timezone.utc),
+                             convert.from_iso8601_compact("20240131T153000"))
+            self.assertEqual(tz, convert.from_iso8601_compact("20240131T153000", tz).tzinfo)
+            self.assertEqual((2, 6), (cache.hits, cache.misses))
+            # cached invalid strings still raise / warn
+            for _ in range(2):
+                with self.assertRaises(ValueError):
+                    convert.from_iso8601_compact("not a date")
+                output = StringIO()
+                with redirect_stdout(output):
+                    self.assertIsNone(convert.to_date("not a date", suppress_warnings=False))
+                self.assertIn("WARNING", output.getvalue())
+            self.assertEqual(expected, convert.to_date_many(values, tz=tz))
+            cache.clear()
+            self.assertEqual((0, 0, 0), (cache.hits, cache.misses, len(cache)))
+        self.assertIsNone(convert.get_date_cache())
+        # the global switch is shared by threads without their own cache
+        cache = convert.enable_date_cache()
+        try:
+            threads = [threading.Thread(target=lambda: [convert.to_date(value) for value in values * 100])
+                       for _ in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            self.assertEqual(2400, cache.hits + cache.misses)
+            self.assertEqual(4, len(cache))
+            with convert.date_cache() as local:
+                self.assertIs(local, convert.get_date_cache())
+            self.assertIs(cache, convert.get_date_cache())
+        finally:
+            convert.disable_date_cache()
+        self.assertIsNone(convert.get_date_cache())
+
+    def test_parse_dates(self):
+        values = ["2024-01-31T15:30:00", "20240131T153000", "2024-01-31", "", None, "not a date",
+                  "2024-01-31T15:30:00+01:00", datetime(2024, 1, 31), "2024-01-31 15:30"]
+        for tz in (timezone.utc, timezone(timedelta(hours=-5)), timezone(timedelta(hours=2), "CUSTOM"), None):
+            # the format inferred from the leading strings decides the parser; every order gives the to_date results
+            for start in range(len(values)):
+                column = values[start:] + values[:start]
+                expected = [convert.to_date(value, tz, none_to_now=False) for value in column]
+                result = convert.parse_dates(column, tz)
+                self.assertEqual(expected, result)
+                self.assertEqual([value and value.tzname() for value in expected],
+                                 [value and value.tzname() for value in result])
+        # a uniform column uses one parser for every value
+        column = [f"202401{day:02}T0{hour}3000" for day in range(1, 29) for hour in range(10)]
+        self.assertEqual([convert.to_date(value) for value in column], convert.parse_dates(column, sample_size=3))
+        # junk after a clean sample isn't hidden by the appended offset (fromisoformat skips one character before it)
+        for tz in (timezone.utc, timezone(timedelta(hours=-5)), None):
+            for clean in ("2024-01-31T08:10:30", "2024-01-31"):
+                column = [clean] * 5 + [clean + junk for junk in ("x", " ", "T", "\n", "0", ":")]
+                self.assertEqual([convert.to_date(value, tz, False) for value in column],
+                                 convert.parse_dates(column, tz))
+        self.assertEqual([], convert.parse_dates([]))
+        self.assertEqual([None, None], convert.parse_dates(iter([None, ""])))
+        self.assertEqual(timezone.utc, convert.parse_dates([None], none_to_now=True)[0].tzinfo)
+        output = StringIO()
+        with redirect_stdout(output):
+            self.assertEqual([None], convert.parse_dates(["not a date"], suppress_warnings=False))
+        self.assertIn("WARNING", output.getvalue())
+        with self.assertRaises(ValueError):
+            convert.parse_dates(values, output='array')
 
 if __name__ == '__main__':
     unittest.main()
@@ -1,8 +1,51 @@
+import asyncio
+import os
+import csv
+import json
 import unittest
 import sqlite3
+import tempfile
+import tracemalloc
+from datetime import datetime, timezone
 from pathlib import Path
 
-from ubercode.utils import cursor
+from ubercode.utils import convert, cursor
+
+
+class ListCursor:
+    """ minimal DB-API style cursor over in memory rows for values a real driver can't produce """
+    def __init__(self, columns, rows):
+        self.description = [(column, None, None, None, None, None, None) for column in columns]
+        self._rows = list(rows)
+
+    def fetchall(self):
+        return self.fetchmany(len(self._rows))
+
+    def fetchmany(self, size):
+        rows, self._rows = self._rows[:size], self._rows[size:]
+        return rows
+
+
+class AsyncCursor:
+    """ in process async cursor wrapping a sqlite3 cursor; awaitable fetch methods like aiosqlite """
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self.fetch_calls = 0
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    async def fetchall(self):
+        self.fetch_calls += 1
+        await asyncio.sleep(0)
+        return self._cursor.fetchall()
+
+    async def fetchmany(self, size):
+        self.fetch_calls += 1
+        await asyncio.sleep(0)
+        return self._cursor.fetchmany(size)
+
 
 class TestCursor(unittest.TestCase):
     # we will start with the default dict for a new django install
@@ -65,3 +108,288 @@ class TestCursor(unittest.TestCase):
             tuples_list = cursor.to_tuples(results)
             print(tuples_list)
             self.assertEqual(tuples_list[0].id, 1)
+
+    # -------- streaming conversions ----------
+    @staticmethod
+    def _create_rows(conn, count):
+        cur = conn.cursor()
+        cur.execute("create table rows(id INTEGER PRIMARY KEY, code TEXT NOT NULL, amount REAL)")
+        cur.executemany("insert into rows (id, code, amount) values (?, ?, ?)",
+                        ((i, f"code{i:08d}", i * 1.5) for i in range(1, count + 1)))
+        return cur
+
+    @staticmethod
+    def _peak_memory(function):
+        tracemalloc.start()
+        try:
+            function()
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    def test_iter_conversions(self):
+        with sqlite3.connect(":memory:") as conn:
+            cur = self._create_rows(conn, 25)
+            # the streaming variants give the same results as the list versions for any batch size
+            sql = "select * from rows order by id"
+            for batch_size in (1, 7, 25, 100):
+                self.assertEqual(cursor.to_values(cur.execute(sql)),
+                                 list(cursor.iter_values(cur.execute(sql), batch_size=batch_size)))
+                self.assertEqual(cursor.to_dicts(cur.execute(sql)),
+                                 list(cursor.iter_dicts(cur.execute(sql), batch_size=batch_size)))
+                self.assertEqual(cursor.to_tuples(cur.execute(sql)),
+                                 list(cursor.iter_tuples(cur.execute(sql), batch_size=batch_size)))
+            tuples = list(cursor.iter_tuples(cur.execute(sql)))
+            self.assertEqual(tuples[-1].code, "code00000025")
+            # an empty result set yields nothing
+            self.assertEqual([], list(cursor.iter_dicts(cur.execute("select * from rows where id < 0"))))
+            # batch size must be positive
+            with self.assertRaises(ValueError):
+                list(cursor.iter_values(cur.execute(sql), batch_size=0))
+
+    def test_iter_memory_bound(self):
+        with sqlite3.connect(":memory:") as conn:
+            cur = self._create_rows(conn, 50000)
+
+            def consume(count, function):
+                def run():
+                    for _ in function(cur.execute(f"select * from rows where id <= {count}"), batch_size=500):
+                        pass
+                return run
+
+            # streaming: peak memory for 50k rows should be about the same as for 5k rows
+            small = self._peak_memory(consume(5000, cursor.iter_dicts))
+            large = self._peak_memory(consume(50000, cursor.iter_dicts))
+            print(f"iter_dicts peak memory: 5k rows={small} bytes, 50k rows={large} bytes")
+            self.assertLess(large, small * 2)
+
+            # materializing with to_dicts grows with the number of rows
+            def materialize():
+                cursor.to_dicts(cur.execute("select * from rows"))
+            self.assertGreater(self._peak_memory(materialize), large * 10)
+
+    # -------- row class caching ----------
+    def test_tuple_class(self):
+        # invalid identifiers are sanitized deterministically instead of raising
+        self.assertEqual(("count", "c_1st", "class_", "id", "id_4", "column_5", "total_amount"),
+                         cursor.sanitize_columns(["count(*)", "1st", "class", "id", "id", "_", "total amount"]))
+        self.assertEqual(cursor.sanitize_columns(["max(x)", "max(x)"]), cursor.sanitize_columns(["max(x)", "max(x)"]))
+        with sqlite3.connect(":memory:") as conn:
+            cur = conn.cursor()
+            cur.execute("create table t(id INTEGER, name TEXT)")
+            cur.executemany("insert into t values (?, ?)", [(1, "a"), (2, "b"), (2, "c")])
+            rows = cursor.to_tuples(cur.execute("select id, count(*) from t group by id order by id"))
+            self.assertEqual(2, rows[1].count)
+            # the same columns share a single generated class across calls and functions
+            first = cursor.to_tuples(cur.execute("select id, name from t"))
+            second = list(cursor.iter_tuples(cur.execute("select id, name from t")))
+            self.assertIs(type(first[0]), type(second[0]))
+            self.assertIs(cursor.tuple_class(("id", "name")), type(first[0]))
+            self.assertNotEqual(type(first[0]), type(rows[0]))
+
+    # -------- columnar conversions ----------
+    def test_to_columns(self):
+        with sqlite3.connect(":memory:") as conn:
+            cur = self._create_rows(conn, 10)
+            sql = "select id, code, amount from rows order by id"
+            columns = cursor.to_columns(cur.execute(sql), batch_size=3)
+            self.assertEqual(["id", "code", "amount"], list(columns.keys()))
+            self.assertEqual(list(range(1, 11)), list(columns["id"]))
+            self.assertEqual([i * 1.5 for i in range(1, 11)], list(columns["amount"]))
+            self.assertEqual([f"code{i:08d}" for i in range(1, 11)], columns["code"])
+            # numeric columns are packed into compact buffers while text stays in a list
+            self.assertNotIsInstance(columns["id"], list)
+            self.assertIsInstance(columns["code"], list)
+            # columns match a transposed to_dicts
+            dicts = cursor.to_dicts(cur.execute(sql))
+            for name, values in columns.items():
+                self.assertEqual([row[name] for row in dicts], list(values))
+            # untyped columns are all lists
+            untyped = cursor.to_columns(cur.execute(sql), typed=False)
+            self.assertTrue(all(isinstance(values, list) for values in untyped.values()))
+            # a None or an out of range value in a later batch demotes the column to a list without losing values
+            cur.execute("update rows set amount = null where id = 8")
+            cur.execute("update rows set id = 9223372036854775807 where id = 10")
+            columns = cursor.to_columns(cur.execute(sql), batch_size=3)
+            self.assertIsInstance(columns["amount"], list)
+            self.assertIsNone(columns["amount"][7])
+            self.assertEqual(9223372036854775807, columns["id"][-1])
+            big = cursor.to_columns(ListCursor(["value"], [(1,), (2,), (2 ** 70,)]), batch_size=2)
+            self.assertEqual([1, 2, 2 ** 70], big["value"])
+            # an empty result still has every column
+            self.assertEqual({"id": [], "code": [], "amount": []},
+                             cursor.to_columns(cur.execute("select id, code, amount from rows where id < 0")))
+
+    # -------- record conversions ----------
+    def test_to_records(self):
+        with sqlite3.connect(":memory:") as conn:
+            cur = self._create_rows(conn, 5)
+            sql = "select id, code, amount as 'total amount' from rows order by id"
+            records = cursor.to_records(cur.execute(sql))
+            self.assertEqual(5, len(records))
+            self.assertEqual(1, records[0].id)
+            self.assertEqual("code00000002", records[1].code)
+            self.assertEqual(1.5, records[0].total_amount)
+            # records convert to dicts and compare like the other formats
+            self.assertEqual({"id": 1, "code": "code00000001", "total_amount": 1.5}, records[0]._asdict())
+            self.assertEqual(list(cursor.to_tuples(cur.execute(sql))[0]), list(records[0]))
+            self.assertEqual(records, list(cursor.iter_records(cur.execute(sql), batch_size=2)))
+            self.assertEqual("Record(id=1, code='code00000001', total_amount=1.5)", repr(records[0]))
+            # records are mutable by default but have no __dict__ so arbitrary attributes can't be added
+            records[0].code = "changed"
+            self.assertEqual("changed", records[0].code)
+            with self.assertRaises(AttributeError):
+                records[0].other = 1
+            # frozen records can't be changed and are hashable
+            frozen = cursor.to_records(cur.execute(sql), mutable=False)
+            with self.assertRaises(AttributeError):
+                frozen[0].code = "changed"
+            self.assertEqual(5, len(set(frozen)))
+            # the class is generated once per schema and mutability
+            self.assertIs(type(records[0]), type(cursor.to_records(cur.execute(sql))[0]))
+            self.assertIsNot(type(records[0]), type(frozen[0]))
+
+    # -------- async conversions ----------
+    def test_async_conversions(self):
+        async def collect(generator):
+            return [item async for item in generator]
+
+        with sqlite3.connect(":memory:") as conn:
+            cur = self._create_rows(conn, 10)
+            sql = "select id, code, amount from rows order by id"
+
+            def acur():
+                return AsyncCursor(conn.execute(sql))
+
+            # async results match the sync conversions
+            self.assertEqual(cursor.to_values(cur.execute(sql)), asyncio.run(cursor.ato_values(acur())))
+            self.assertEqual(cursor.to_dicts(cur.execute(sql)), asyncio.run(cursor.ato_dicts(acur())))
+            self.assertEqual(cursor.to_tuples(cur.execute(sql)), asyncio.run(cursor.ato_tuples(acur())))
+            self.assertEqual(cursor.to_records(cur.execute(sql)), asyncio.run(cursor.ato_records(acur())))
+            self.assertEqual(cursor.to_columns(cur.execute(sql), typed=False),
+                             asyncio.run(cursor.ato_columns(acur(), typed=False)))
+            self.assertEqual(cursor.to_values(cur.execute(sql)), asyncio.run(collect(cursor.aiter_values(acur()))))
+            self.assertEqual(cursor.to_dicts(cur.execute(sql)), asyncio.run(collect(cursor.aiter_dicts(acur()))))
+            self.assertEqual(cursor.to_tuples(cur.execute(sql)), asyncio.run(collect(cursor.aiter_tuples(acur()))))
+            self.assertEqual(cursor.to_records(cur.execute(sql)),
+                             asyncio.run(collect(cursor.aiter_records(acur(), batch_size=3))))
+            # rows are streamed in batches; 10 rows in batches of 3 is 4 batches plus the empty fetch at the end
+            streamed = acur()
+            asyncio.run(collect(cursor.aiter_dicts(streamed, batch_size=3)))
+            self.assertEqual(5, streamed.fetch_calls)
+            # the row classes are shared with the sync functions
+            self.assertIs(type(cursor.to_tuples(cur.execute(sql))[0]), type(asyncio.run(cursor.ato_tuples(acur()))[0]))
+
+    # -------- converters ----------
+    def test_converters(self):
+        with sqlite3.connect(":memory:") as conn:
+            cur = conn.cursor()
+            cur.execute("create table events(id TEXT, active TEXT, created TEXT)")
+            cur.executemany("insert into events values (?, ?, ?)",
+                            [("1", "yes", "2024-01-31T08:10:30"), ("2", "off", "20240201"), ("x", None, None)])
+            sql = "select id, active, created from events"
+            converters = {"id": convert.to_int, "active": convert.to_bool, "created": "date"}
+            expected = [
+                {"id": 1, "active": True, "created": datetime(2024, 1, 31, 8, 10, 30, tzinfo=timezone.utc)},
+                {"id": 2, "active": False, "created": datetime(2024, 2, 1, tzinfo=timezone.utc)},
+                {"id": 0, "active": False, "created": None},
+            ]
+            self.assertEqual(expected, cursor.to_dicts(cur.execute(sql), converters=converters))
+            # the same conversion can be given as a type spec string
+            spec = "id:int, active:bool, created:date"
+            self.assertEqual(expected, cursor.to_dicts(cur.execute(sql), converters=spec))
+            # and works the same for every output format
+            self.assertEqual(expected, list(cursor.iter_dicts(cur.execute(sql), batch_size=2, converters=spec)))
+            self.assertEqual(expected, [row._asdict() for row in cursor.to_tuples(cur.execute(sql), converters=spec)])
+            self.assertEqual(expected, [row._asdict() for row in cursor.to_records(cur.execute(sql), converters=spec)])
+            self.assertEqual([1, 2, 0], cursor.to_values(cur.execute(sql), converters=spec))
+            self.assertEqual([1, 2, 0], list(cursor.iter_values(cur.execute(sql), converters=spec)))
+            self.assertEqual(expected, asyncio.run(cursor.ato_dicts(AsyncCursor(cur.execute(sql)), converters=spec)))
+            # converted int columns are still packed in the columnar format
+            columns = cursor.to_columns(cur.execute(sql), converters=spec)
+            self.assertEqual([1, 2, 0], list(columns["id"]))
+            self.assertNotIsInstance(columns["id"], list)
+            self.assertEqual([True, False, False], columns["active"])
+            # unknown columns or type names are reported instead of silently ignored
+            with self.assertRaises(ValueError):
+                cursor.to_dicts(cur.execute(sql), converters={"missing": convert.to_int})
+            with self.assertRaises(ValueError):
+                cursor.to_dicts(cur.execute(sql), converters="id:integer")
+
+    # -------- file exports ----------
+    def test_export(self):
+        with sqlite3.connect(":memory:") as conn, tempfile.TemporaryDirectory() as folder:
+            cur = self._create_rows(conn, 1000)
+            cur.execute("update rows set code = 'comma, \"quoted\"' where id = 3")
+            cur.execute("update rows set amount = null where id = 4")
+            sql = "select * from rows order by id"
+            for format in ("jsonl", "csv"):
+                serial = Path(folder, f"serial.{format}")
+                parallel = Path(folder, f"parallel.{format}")
+                self.assertEqual(1000, cursor.export(cur.execute(sql), serial, format=format, chunk_rows=64, workers=1))
+                self.assertEqual(1000, cursor.export(cur.execute(sql), parallel, format=format, chunk_rows=64, workers=4))
+                # the parallel export is byte-identical to the serial one
+                self.assertEqual(serial.read_bytes(), parallel.read_bytes())
+            # json lines match the dict conversion
+            with open(Path(folder, "parallel.jsonl"), encoding="utf-8") as jsonl:
+                self.assertEqual(cursor.to_dicts(cur.execute(sql)), [json.loads(line) for line in jsonl])
+            # csv has a header and round trips through the csv reader
+            with open(Path(folder, "parallel.csv"), encoding="utf-8", newline="") as csv_file:
+                lines = list(csv.reader(csv_file))
+            self.assertEqual(["id", "code", "amount"], lines[0])
+            self.assertEqual(["3", 'comma, "quoted"', "4.5"], lines[3])
+            self.assertEqual(["4", "code00000004", ""], lines[4])
+            # converters are applied and an empty result only writes the header
+            path = Path(folder, "converted.jsonl")
+            cursor.export(cur.execute("select id from rows where id < 3"), path, converters={"id": str})
+            self.assertEqual('{"id": "1"}\n{"id": "2"}\n', path.read_text(encoding="utf-8"))
+            path = Path(folder, "empty.csv")
+            self.assertEqual(0, cursor.export(cur.execute("select * from rows where id < 0"), path, format="csv"))
+            self.assertEqual(b"id,code,amount\r\n", path.read_bytes())
+            with self.assertRaises(ValueError):
+                cursor.export(cur.execute(sql), path, format="xml")
+
+    # -------- columnar spill files ----------
+    def test_spill(self):
+        with sqlite3.connect(":memory:") as conn, tempfile.TemporaryDirectory() as folder:
+            cur = self._create_rows(conn, 2500)
+            cur.execute("update rows set amount = null where id = 2400")
+            path = Path(folder, "rows.spill")
+            sql = "select id, code, amount, id * 2 as doubled from rows order by id"
+            self.assertEqual(2500, cursor.spill(cur.execute(sql), path, batch_size=1000))
+            expected = cursor.to_columns(cur.execute(sql), typed=False)
+            with cursor.SpillFile(path) as spilled:
+                self.assertEqual(2500, spilled.rows)
+                self.assertEqual(["id", "code", "amount", "doubled"], spilled.columns)
+                self.assertEqual({"id": "q", "code": "object", "amount": "object", "doubled": "q"}, spilled.types)
+                # numeric columns are zero-copy views over the mapped file
+                ids = spilled["id"]
+                self.assertIsInstance(ids, memoryview)
+                self.assertEqual("q", ids.format)
+                self.assertEqual(expected["id"], ids.tolist())
+                self.assertEqual(5000, ids[-1] * 2)
+                ids.release()
+                # the amount column was demoted to json values when the None showed up in a later batch
+                self.assertEqual(expected["amount"], spilled["amount"])
+                self.assertIsNone(spilled["amount"][2399])
+                self.assertEqual(expected["code"], spilled["code"])
+                columns = spilled.to_columns()
+                self.assertEqual(expected["doubled"], columns["doubled"].tolist())
+                columns["id"].release()
+                columns["doubled"].release()
+            # floats and empty results
+            cursor.spill(cur.execute("select amount from rows where id < 4"), path)
+            with cursor.SpillFile(path) as spilled:
+                self.assertEqual("d", spilled.types["amount"])
+                self.assertEqual([1.5, 3.0, 4.5], spilled["amount"].tolist())
+            cursor.spill(cur.execute("select id, code from rows where id < 0"), path)
+            with cursor.SpillFile(path) as spilled:
+                self.assertEqual(0, spilled.rows)
+                self.assertEqual([], spilled["id"])
+            # other files are rejected
+            other = Path(folder, "other.bin")
+            other.write_bytes(b"not a spill file")
+            with self.assertRaises(ValueError):
+                cursor.SpillFile(other)
+            # only the spill file is left behind
+            self.assertEqual(["other.bin", "rows.spill"], sorted(os.listdir(folder)))
@@ -1,6 +1,15 @@
+import json
+import sys
+import tempfile
 import unittest
+import unittest.mock
+import uuid
+import xml.etree.ElementTree as Etree
+from datetime import datetime
+from io import BytesIO, StringIO
 from pathlib import Path
 
+from ubercode.utils import convert, cursor, data
 from ubercode.utils.data import JSON
 from ubercode.utils.data import XML
 
@@ -100,6 +109,157 @@ class TestJSON(unittest.TestCase):
         result = "{'people': [{'firstName': 'Joe &amp; Baker', 'lastName': 'Jackson', 'gender': 'male', 'age': 28, 'number': '7349282382', 'groups': ['members', 'student']}, {'firstName': 'James &amp;', 'lastName': 'Smith', 'gender': 'male', 'age': 32, 'number': '5678568567', 'groups': ['members', 'professional']}, {'firstName': 'Emily', 'lastName': 'Jones', 'gender': 'female', 'age': 24, 'number': '456754675'}]}"
         self.assertEqual(str(json), result)
 
+    def test_iter_lines(self):
+        with tempfile.TemporaryDirectory() as folder:
+            path = Path(folder, "people.jsonl")
+            # utf-8 BOM and blank lines are handled like the file loader
+            path.write_text('{"name": "Joe & Baker"}\n\n{"name": "James &amp;"}\n[1, 2]\n', encoding="utf-8-sig")
+            self.assertEqual([{"name": "Joe & Baker"}, {"name": "James &amp;"}, [1, 2]], list(JSON().iter_lines(str(path))))
+            encoded = list(JSON(encode_ampersands=True).iter_lines(str(path)))
+            self.assertEqual([{"name": "Joe &amp; Baker"}, {"name": "James &amp;"}, [1, 2]], encoded)
+
+    def test_iter_array(self):
+        file_path = Path(__file__).resolve().parent / 'test.json'
+        expected = JSON().from_json_file(str(file_path)).data
+        # items of a nested array are decoded one at a time; tiny reads exercise values split across reads
+        for read_size in (1, 7, 64, 65536):
+            people = list(JSON().iter_array(str(file_path), "people", read_size=read_size))
+            self.assertEqual(expected["people"], people)
+        document = {
+            "meta": {"skip": [1, {"a": "}]\\\"["}, "x \\"], "count": 12345678901234567890},
+            "data": {"before": "[not] {this}", "items": [1.5e10, -2, "three", None, True, {"four": [4]}, []]},
+            "after": [9, 9, 9],
+        }
+        with tempfile.TemporaryDirectory() as folder:
+            path = Path(folder, "document.json")
+            path.write_text(json.dumps(document), encoding="utf-8-sig")
+            for read_size in (1, 2, 3, 5, 1024):
+                items = list(JSON().iter_array(str(path), "data.items", read_size=read_size))
+                self.assertEqual(document["data"]["items"], items, f"read size {read_size}")
+                self.assertEqual([9, 9, 9], list(JSON().iter_array(str(path), "after", read_size=read_size)))
+            # top level arrays and empty arrays
+            path.write_text('[{"name": "a & b"}, {"name": "c"}]', encoding="utf-8")
+            self.assertEqual([{"name": "a & b"}, {"name": "c"}], list(JSON().iter_array(str(path))))
+            encoded = list(JSON(encode_ampersands=True).iter_array(str(path), read_size=3))
+            self.assertEqual([{"name": "a &amp; b"}, {"name": "c"}], encoded)
+            path.write_text('{"empty": [ ]}', encoding="utf-8")
+            self.assertEqual([], list(JSON().iter_array(str(path), "empty")))
+            # a missing key or a value that isn't an array is an error
+            with self.assertRaises(ValueError):
+                list(JSON().iter_array(str(path), "missing"))
+            path.write_text('{"value": {"a": 1}}', encoding="utf-8")
+            with self.assertRaises(ValueError):
+                list(JSON().iter_array(str(path), "value"))
+        # a malformed item is raised without reading the rest of the stream into the buffer
+        items = '[{"a": 1}, {"a": bad}, ' + ", ".join(['{"a": 1}'] * 10000) + "]"
+        source = StringIO(items)
+        with self.assertRaises(json.JSONDecodeError):
+            list(data._JSONArrayReader(source, read_size=64).iter_array([]))
+        self.assertLess(source.tell(), 1024)
+
+    def test_from_json_file_mmap(self):
+        file_path = Path(__file__).resolve().parent / 'test.json'
+        expected = JSON().from_json_file(str(file_path), mmap_threshold=sys.maxsize).data
+        with tempfile.TemporaryDirectory() as folder:
+            path = Path(folder, "data.json")
+            for backend in data.available_json_backends():
+                # memory mapped files give the same results as read files
+                self.assertEqual(expected, JSON(backend=backend).from_json_file(str(file_path), mmap_threshold=0).data)
+                path.write_text('{"name": "caf\u00e9 & &amp;", "nan": NaN}', encoding="utf-8-sig")
+                for encode_ampersands in (False, True):
+                    mapped = JSON(encode_ampersands=encode_ampersands, backend=backend)
+                    mapped.from_json_file(str(path), mmap_threshold=0)
+                    read = JSON(encode_ampersands=encode_ampersands, backend=backend)
+                    read.from_json_file(str(path), mmap_threshold=sys.maxsize)
+                    self.assertEqual(read.data["name"], mapped.data["name"])
+                    self.assertNotEqual(mapped.data["nan"], mapped.data["nan"])
+                # utf-16 is detected like json.loads does
+                path.write_text('{"name": "caf\u00e9"}', encoding="utf-16")
+                self.assertEqual({"name": "caf\u00e9"}, JSON(backend=backend).from_json_file(str(path), 1).data)
+                with self.assertRaises(json.JSONDecodeError):
+                    path.write_text('{"name": }')
+                    JSON(backend=backend).from_json_file(str(path), mmap_threshold=0)
+                # a file that is only a BOM leaves data unset
+                path.write_bytes(b"\xef\xbb\xbf")
+                self.assertIsNone(JSON(backend=backend).from_json_file(str(path), mmap_threshold=0).data)
+
+    def test_write_json(self):
+        file_path = Path(__file__).resolve().parent / 'test.json'
+        json_data = JSON().from_json_file(str(file_path))
+        # streaming output is the same as json.dumps
+        for indent in (None, 2):
+            streamed = StringIO()
+            json_data.write_json(streamed, indent=indent, write_size=16)
+            self.assertEqual(json.dumps(json_data.data, indent=indent), streamed.getvalue())
+            whole = StringIO()
+            json_data.write_json(whole, stream=False, indent=indent)
+            self.assertEqual(streamed.getvalue(), whole.getvalue())
+        # the streamed document is written in chunks instead of one string
+        writes = []
+
+        class Recorder:
+            def write(self, text):
+                writes.append(text)
+
+        large = JSON()
+        large.data = {"rows": [{"id": i, "name": f"name {i}"} for i in range(5000)]}
+        large.write_json(Recorder(), write_size=4096)
+        self.assertGreater(len(writes), 10)
+        self.assertLess(max(map(len, writes)), 4096 * 2)
+        self.assertEqual(json.dumps(large.data), "".join(writes))
+        # round trips through a file path
+        with tempfile.TemporaryDirectory() as folder:
+            path = Path(folder, "out.json")
+            json_data.write_json(str(path))
+            self.assertEqual(json_data.data, JSON().from_json_file(str(path)).data)
+
+    def test_json_backends(self):
+        available = data.available_json_backends()
+        self.assertEqual('json', available[-1])
+        self.assertEqual(available[0], data.get_json_backend())
+        self.assertEqual(available[0], JSON().codec.name)
+        file_path = Path(__file__).resolve().parent / 'test.json'
+        expected = json.loads(file_path.read_text())
+        text = '{"big": 123456789012345678901234567890, "nan": NaN, "name": "caf\u00e9 / \u2603", "n": 1.5e300}'
+        for backend in available:
+            # every backend gives the standard library results, including for input only it accepts
+            self.assertEqual(expected, JSON(backend=backend).from_json_file(str(file_path)).data)
+            value = JSON(text, backend=backend)
+            self.assertEqual(backend, value.codec.name)
+            self.assertEqual(123456789012345678901234567890, value.data["big"])
+            self.assertNotEqual(value.data["nan"], value.data["nan"])
+            self.assertEqual("caf\u00e9 / \u2603", value.data["name"])
+            self.assertEqual(1.5e300, value.data["n"])
+            # invalid json raises the standard library error
+            with self.assertRaises(json.JSONDecodeError):
+                JSON('{"a": }', backend=backend)
+            # compact output that round trips (non-str keys fall back to the standard library)
+            value.data = {"a": [1, 2.5, None, True], "b": "caf\u00e9", 1: "x"}
+            self.assertEqual('{"a":[1,2.5,null,true],"b":"caf\u00e9","1":"x"}', value.to_json_string())
+            # encoding has the standard library semantics: NaN isn't turned into null and types json can't encode raise
+            value.data = {"nan": float("nan"), "inf": float("inf")}
+            self.assertEqual('{"nan":NaN,"inf":Infinity}', value.to_json_string())
+            for unsupported in (datetime(2024, 1, 31), uuid.uuid4(), {"when": datetime(2024, 1, 31)}):
+                value.data = unsupported
+                with self.assertRaises(TypeError):
+                    value.to_json_string()
+        # the global setting is used by instances that don't pick a backend
+        try:
+            self.assertEqual('json', data.set_json_backend('json'))
+            self.assertEqual('json', data.get_json_backend())
+            self.assertEqual('json', JSON().codec.name)
+            self.assertEqual(available[0], JSON(backend='auto').codec.name)
+        finally:
+            data.set_json_backend()
+        self.assertEqual(available[0], data.get_json_backend())
+        with self.assertRaises(ValueError):
+            data.set_json_backend('nope')
+        self.assertEqual(available[0], data.get_json_backend())
+        for backend in data.JSON_BACKENDS:
+            if backend not in available:
+                with self.assertRaises(ValueError):
+                    JSON("[]", backend=backend)
+
 
 class TestXML(unittest.TestCase):
 
@@ -157,4 +317,403 @@ class TestXML(unittest.TestCase):
         xml_dict = xml.to_dict()
         self.assertEqual(xml_dict['contacts']['contact'][0]['@attr'], '1')
 
+    def test_iter_elements(self):
+        records = "".join(
+            f'<record id="{i}"><name>Name {i} & Sons &amp; Co</name><amount>{i}</amount></record>' for i in range(500)
+        )
+        xml_string = f"<feed><header><count>500</count></header><records>{records}</records></feed>"
+        with tempfile.TemporaryDirectory() as folder:
+            path = Path(folder, "feed.xml")
+            path.write_text(xml_string, encoding="utf-8")
+            xml = XML(encode_ampersands=True)
+            # each record is yielded as a tree_to_dict style dict and matches the full tree conversion
+            records = list(xml.iter_elements(str(path), tag="record"))
+            full = xml.from_xml_file(str(path)).to_dict()
+            self.assertEqual(500, len(records))
+            self.assertEqual(full["feed"]["records"]["record"], [record["record"] for record in records])
+            self.assertEqual({"record": {"name": "Name 7 & Sons & Co", "amount": "7", "@id": "7"}}, records[7])
+            # without encoding the bare ampersands are invalid xml
+            with self.assertRaises(Etree.ParseError):
+                list(XML().iter_elements(str(path), tag="record"))
+            # the declared encoding is honoured while encoding ampersands
+            latin = '<?xml version="1.0" encoding="ISO-8859-1"?><feed><record><name>Caf\u00e9 & Co</name></record></feed>'
+            path.write_bytes(latin.encode("iso-8859-1"))
+            expected = [{"record": {"name": "Caf\u00e9 & Co"}}]
+            self.assertEqual(expected, list(xml.iter_elements(str(path), tag="record")))
+            self.assertEqual(expected[0]["record"], xml.from_xml_file(str(path)).to_dict()["feed"]["record"])
+            schema = data.XMLSchema({"name": "name"})
+            self.assertEqual(["Caf\u00e9 & Co"], [record.name for record in xml.iter_extract(str(path), schema)])
+            # other tags can be streamed the same way
+            path.write_text(xml_string.replace(" & ", " and "), encoding="utf-8")
+            self.assertEqual([{"count": "500"}], list(XML().iter_elements(str(path), tag="count")))
+
+    def test_extract(self):
+        xml_string = ('<feed><count>2</count>'
+                      '<record id="1"><name> Joe </name><born>2001-02-03</born><address type="home"><city>Here</city>'
+                      '</address><active>yes</active></record>'
+                      '<group><record id="2"><name>Jane</name><active>0</active></record></group>'
+                      '<record id="3"/></feed>')
+        fields = {'id': ('@id', 'int'), 'name': 'name', 'born': ('born', 'date'), 'city': 'address/city',
+                  'type': 'address/@type', 'active': ('active/#text', 'bool'), 'code': ('code', len)}
+        expected = [(1, "Joe", convert.to_date("2001-02-03", none_to_now=False), "Here", "home", True, None),
+                    (2, "Jane", None, None, None, False, None),
+                    (3, None, None, None, None, None, None)]
+        schema = data.XMLSchema(fields)
+        records = list(XML(xml_string).extract(schema))
+        self.assertEqual(expected, [tuple(record) for record in records])
+        self.assertIs(cursor.record_class(tuple(fields), True), type(records[0]))
+        self.assertEqual("Joe", records[0].name)
+        # streaming gives the same records
+        with tempfile.TemporaryDirectory() as folder:
+            path = Path(folder, "feed.xml")
+            path.write_text(xml_string.replace("Joe", "Joe & Sons"), encoding="utf-8")
+            records = list(XML(encode_ampersands=True).iter_extract(str(path), schema))
+            self.assertEqual("Joe & Sons", records[0].name)
+            self.assertEqual(expected[1:], [tuple(record) for record in records[1:]])
+        # named tuples, frozen records and other tags
+        rows = list(XML(xml_string).extract(data.XMLSchema({'id': '@id', 'text': '#text'}, output='tuple')))
+        self.assertEqual([("1", None), ("2", None), ("3", None)], rows)
+        self.assertEqual("1", rows[0].id)
+        frozen = next(XML(xml_string).extract(data.XMLSchema({'n': ('.', int)}, tag='count', output='frozen')))
+        self.assertEqual(2, frozen.n)
+        with self.assertRaises(AttributeError):
+            frozen.n = 3
+        self.assertEqual([], list(XML().extract(schema)))
+        # namespaced tags can be used in paths
+        namespaced = XML('<r xmlns:a="http://x.org/a"><a:item a:id="7"><a:v>1</a:v></a:item></r>')
+        schema = data.XMLSchema({'id': '@{http://x.org/a}id', 'v': ('{http://x.org/a}v', 'int')},
+                                tag='{http://x.org/a}item')
+        self.assertEqual([("7", 1)], [tuple(record) for record in namespaced.extract(schema)])
+        for bad in ({'a': ('a', 'float')}, {'a': 'a[@'}):
+            with self.assertRaises(ValueError):
+                data.XMLSchema(bad)
+        with self.assertRaises(ValueError):
+            data.XMLSchema({'a': 'a'}, output='dict')
+
+    def test_escape_ampersands(self):
+        text = 'a & b &amp; &lt; &gt; &quot; &apos; &#38; &#x26; &#X2f; &#; &nbsp; &ampx;'
+        expected = 'a &amp; b &amp; &lt; &gt; &quot; &apos; &#38; &#x26; &#X2f; &amp;#; &amp;nbsp; &amp;ampx;'
+        self.assertEqual(expected, data.escape_ampersands(text))
+        self.assertEqual(expected.encode(), data.escape_ampersands(text.encode()))
+        # input without an ampersand is returned untouched
+        value = b"<root>no entities</root>"
+        self.assertIs(value, data.escape_ampersands(value))
+        # all four loaders share the encoder so existing entities are never double encoded
+        xml = XML('<root a="&quot;x&quot; & y">&#38; &apos; &</root>', encode_ampersands=True)
+        self.assertEqual({"root": {"@a": '"x" & y', "#text": "& ' &"}}, xml.to_dict())
+        json = JSON('{"name": "&quot; & &#38;"}', encode_ampersands=True)
+        self.assertEqual({"name": "&quot; &amp; &#38;"}, json.data)
+        with tempfile.TemporaryDirectory() as folder:
+            path = Path(folder, "entities.xml")
+            path.write_text('<root a="&quot;x&quot; & y">&#38; &apos; &</root>', encoding="utf-8-sig")
+            self.assertEqual(xml.to_dict(), XML(encode_ampersands=True).from_xml_file(str(path)).to_dict())
+            path = Path(folder, "entities.json")
+            path.write_text('{"name": "&quot; & &#38;"}', encoding="utf-8-sig")
+            self.assertEqual(json.data, JSON(encode_ampersands=True).from_json_file(str(path)).data)
+
+    def test_ampersand_encoding_reader(self):
+        # the streaming filter gives the same result as encoding the whole string no matter where chunks split
+        # entities of any length (ex: zero padded character references) are held back until they are complete
+        text = "a & b &amp; c &lt; d &gt; e &am f & &quot; &#38; &#x26; &#xZZ; &" * 3 + "&#0000000000000065; &#00000000x" \
+            + "&amp"
+        expected = data.escape_ampersands(text)
+        self.assertIn("&#0000000000000065;", expected)
+        # text and binary files are filtered the same way
+        for source, expected in ((StringIO(text), expected), (BytesIO(text.encode()), expected.encode())):
+            for size in (1, 2, 3, 4, 5, 7, 16, 1024):
+                source.seek(0)
+                reader = data._AmpersandEncodingReader(source)
+                chunks = []
+                while True:
+                    chunk = reader.read(size)
+                    if not chunk:
+                        break
+                    chunks.append(chunk)
+                self.assertEqual(expected, expected[:0].join(chunks), f"chunk size {size}")
+
+    def test_from_xml_file_mmap(self):
+        text = "<root>" + "<a>&amp; x & y &#38; &lt;</a><b c='&quot;&'>&#x26;&#0000000000000065;&</b>" * 50 + "</root>"
+        expected = XML(text, encode_ampersands=True).to_dict()
+        with tempfile.TemporaryDirectory() as folder:
+            path = Path(folder, "data.xml")
+            path.write_text(text, encoding="utf-8-sig")
+            mapped = XML(encode_ampersands=True).from_xml_file(str(path), mmap_threshold=0)
+            self.assertEqual(expected, mapped.to_dict())
+            # escaped chunks never split an entity no matter the chunk size
+            with open(path, 'rb') as xml_file, data._MappedFile(xml_file) as mapped:
+                for size in (1, 2, 5, 7, 16, 17, 100, 4096):
+                    chunks = list(mapped.escaped_chunks(size=size))
+                    self.assertEqual(data.escape_ampersands(path.read_bytes()), b"".join(chunks))
+            # a long reference split far from its & is still held back whole
+            path.write_bytes(b"<r>" + b"x" * 30 + b"&#0000000000000065;</r>")
+            with open(path, 'rb') as xml_file, data._MappedFile(xml_file) as mapped:
+                for size in range(1, 60):
+                    self.assertEqual(path.read_bytes(), b"".join(mapped.escaped_chunks(size=size)), f"size {size}")
+
+    def test_tree_to_dict(self):
+        # mixed attributes, text, repeated tags and whitespace only text
+        xml_string = """<root a="1">root text
+    <leaf/>
+    <text>  value  </text>
+    <empty>   </empty>
+    <item id="1"/>
+    <item id="2">two</item>
+    <item><name>three</name></item>
+    <group>group text<x>1</x><y>2</y><x>3</x>ignored tail</group>
+</root>"""
+        expected = {"root": {
+            "leaf": None,
+            "text": "value",
+            "empty": "",
+            "item": [{"@id": "1"}, {"@id": "2", "#text": "two"}, {"name": "three"}],
+            "group": {"x": ["1", "3"], "y": "2", "#text": "group text"},
+            "@a": "1",
+            "#text": "root text",
+        }}
+        self.assertEqual(expected, XML(xml_string).to_dict())
+        self.assertEqual({"single": "value"}, XML("<single> value </single>").to_dict())
+        self.assertEqual({"single": {"@a": "1"}}, XML('<single a="1"> </single>').to_dict())
+        # deeply nested documents don't hit the recursion limit
+        depth = sys.getrecursionlimit() * 3
+        root = node = Etree.Element("root")
+        for _ in range(depth):
+            node = Etree.SubElement(node, "level")
+        node.text = "bottom"
+        value = XML.tree_to_dict(root)["root"]
+        for _ in range(depth - 1):
+            value = value["level"]
+        self.assertEqual({"level": "bottom"}, value)
+
+    def test_as_mapping(self):
+        file_path = Path(__file__).resolve().parent / 'test.xml'
+        xml_string = """
+<contacts updated="2024-01-31">contact list
+    <contact attr="1"><name>Steve Stacha</name><phone type="cell">555</phone></contact>
+    <contact><name>Buggs Bunny</name></contact>
+    <group>friends<contact><name>Daffy Duck</name></contact></group>
+</contacts>
+"""
+        xml = XML(xml_string)
+        view = xml.as_mapping()
+        expected = xml.to_dict()
+        self.assertEqual(list(expected), list(view))
+        contacts = view["contacts"]
+        # keys and values follow the to_dict conventions
+        self.assertEqual(list(expected["contacts"]), list(contacts))
+        self.assertEqual("2024-01-31", contacts["@updated"])
+        self.assertEqual("contact list", contacts["#text"])
+        self.assertEqual("1", contacts["contact"][0]["@attr"])
+        self.assertEqual({"@type": "cell", "#text": "555"}, dict(contacts["contact"][0]["phone"]))
+        self.assertEqual("Daffy Duck", contacts["group"]["contact"]["name"])
+        self.assertEqual(expected, view.to_dict())
+        self.assertEqual(expected["contacts"]["group"], contacts["group"].to_dict())
+        self.assertIn("group", contacts)
+        self.assertNotIn("missing", contacts)
+        self.assertEqual("none", contacts.get("missing", "none"))
+        # converted parts are memoized and the view is read-only
+        self.assertIs(contacts["group"], contacts["group"])
+        self.assertIsInstance(contacts["contact"], tuple)
+        with self.assertRaises(TypeError):
+            contacts["new"] = 1
+        # only the parts that are accessed get converted
+        fresh = XML(xml_string).as_mapping()
+        self.assertEqual("Buggs Bunny", fresh["contacts"]["contact"][1]["name"])
+        self.assertIsNone(fresh["contacts"]["group"]._index)
+        self.assertIsNone(fresh["contacts"]["contact"][0]["phone"]._index)
+        # matches the eager conversion for a file too
+        xml.from_xml_file(str(file_path))
+        self.assertEqual(xml.to_dict(), xml.as_mapping().to_dict())
+        self.assertEqual(0, len(XML().as_mapping()))
+
+    def test_write_xml(self):
+        xml_string = '<contacts count="2"><contact id="1"><name>Steve &amp; Co</name></contact>' \
+                     '<contact id="2"><name>Buggs</name><empty /></contact></contacts>'
+        xml = XML(xml_string)
+        binary = BytesIO()
+        xml.write_xml(binary)
+        self.assertEqual(xml_string.encode(), binary.getvalue())
+        text = StringIO()
+        xml.write_xml(text, stream=False)
+        self.assertEqual(xml_string, text.getvalue())
+        with tempfile.TemporaryDirectory() as folder:
+            path = Path(folder, "out.xml")
+            xml.write_xml(str(path), xml_declaration=True)
+            self.assertEqual(xml.to_dict(), XML().from_xml_file(str(path)).to_dict())
+            self.assertTrue(path.read_text(encoding="utf-8").startswith("<?xml"))
+        with self.assertRaises(ValueError):
+            XML().write_xml(BytesIO())
+
+    def test_dict_to_tree(self):
+        file_path = Path(__file__).resolve().parent / 'test.xml'
+        xml_string = """<root a="1">root text<leaf/><text>value</text><item id="1"/><item id="2">two</item>
+            <item><name>three</name></item><group>group<x>1</x><x>3</x><y>2</y></group><blank>   </blank></root>"""
+        for xml in (XML(xml_string), XML().from_xml_file(str(file_path))):
+            expected = xml.to_dict()
+            # dict -> tree -> dict round trips
+            self.assertEqual(expected, XML.tree_to_dict(XML.dict_to_tree(expected)))
+            self.assertEqual(expected, XML().from_dict(expected).to_dict())
+        self.assertEqual({"a": {"b": ""}}, XML.tree_to_dict(XML.dict_to_tree(XML("<a><b>   </b></a>").to_dict())))
+        # scalar values become text
+        tree = XML.dict_to_tree({"row": {"@id": 7, "count": 3, "missing": None, "tag": ["a", "b"]}})
+        self.assertEqual('<row id="7"><count>3</count><missing /><tag>a</tag><tag>b</tag></row>',
+                         Etree.tostring(tree, encoding="unicode"))
+        with self.assertRaises(ValueError):
+            XML.dict_to_tree({"a": 1, "b": 2})
+
+
+class TestLoadMany(unittest.TestCase):
+
+    def _write_files(self, folder: str, kind: str, count: int):
+        paths = []
+        for i in range(count):
+            path = Path(folder, f"{i}.{kind}")
+            if kind == 'xml':
+                path.write_text(f'<record id="{i}"><name>name {i}</name></record>')
+            else:
+                path.write_text(json.dumps({"id": i, "name": f"name {i}"}))
+            paths.append(str(path))
+        return paths
+
+    def test_load_many(self):
+        with tempfile.TemporaryDirectory() as folder:
+            paths = self._write_files(folder, 'xml', 20)
+            # a broken and a missing file are reported instead of stopping the batch
+            bad = Path(folder, "bad.xml")
+            bad.write_text("<record><name>oops</record>")
+            paths[5:5] = [str(bad), str(Path(folder, "missing.xml"))]
+            expected = {path: {"record": {"name": f"name {Path(path).stem}", "@id": Path(path).stem}}
+                        for path in paths if Path(path).stem.isdigit()}
+            for mode in ('thread', 'process'):
+                for workers in (1, 3):
+                    results = list(data.load_many(paths, workers=workers, mode=mode, to_dict=True))
+                    self.assertEqual(paths, [result.path for result in results])
+                    for result in results:
+                        if result.path in expected:
+                            self.assertIsNone(result.error)
+                            self.assertEqual(expected[result.path], result.data)
+                        else:
+                            self.assertIsNone(result.data)
+                    self.assertIsInstance(results[5].error, Etree.ParseError)
+                    self.assertIsInstance(results[6].error, FileNotFoundError)
+                    # unordered results still cover every path once
+                    results = list(data.load_many(paths, workers=workers, mode=mode, ordered=False, to_dict=True))
+                    self.assertEqual(sorted(paths), sorted(result.path for result in results))
+            # without to_dict the loaded XML instances are returned
+            result = next(data.load_many(paths[:1]))
+            self.assertIsInstance(result.data, XML)
+            self.assertEqual("record", result.data.data.tag)
+
+    def test_load_many_json(self):
+        with tempfile.TemporaryDirectory() as folder:
+            paths = self._write_files(folder, 'json', 10)
+            results = list(data.load_many(paths, kind='json', mode='process', to_dict=True))
+            self.assertEqual([{"id": i, "name": f"name {i}"} for i in range(10)], [result.data for result in results])
+            results = list(data.load_many(iter(paths), kind='json', workers=2))
+            self.assertEqual(results[3].data.data, {"id": 3, "name": "name 3"})
+            self.assertIsInstance(results[3].data, JSON)
+        # bad arguments raise on the call itself, before the results are iterated
+        with self.assertRaises(ValueError):
+            data.load_many([], kind='yaml')
+        with self.assertRaises(ValueError):
+            data.load_many([], mode='fiber')
+
+
+class TestParseCache(unittest.TestCase):
+
+    def test_json_cache(self):
+        cache = data.ParseCache()
+        text = '{"name": "Joe & Sons", "tags": ["a", {"b": 1}]}'
+        first = JSON(text, cache=cache)
+        second = JSON(text, cache=cache)
+        self.assertEqual({"hits": 1, "misses": 1, "entries": 1, "bytes": len(text)}, cache.stats())
+        self.assertIs(first.data, second.data)
+        self.assertEqual(data.freeze(json.loads(text)), first.data)
+        self.assertEqual(("a", {"b": 1}), first.data["tags"])
+        # cached data is frozen but still encodes and queries like the parsed data
+        self.assertIsInstance(first.data, dict)
+        with self.assertRaises(TypeError):
+            first.data["name"] = "x"
+        with self.assertRaises(TypeError):
+            first.data["tags"][1].update(b=2)
+        self.assertEqual(json.dumps(json.loads(text)), json.dumps(first.data))
+        self.assertEqual(json.loads(text), json.loads(first.to_json_string()))
+        self.assertEqual([1], list(first.select("tags[*].b")))
+        mutable = dict(first.data)
+        mutable["name"] = "x"
+        self.assertEqual("Joe & Sons", second.data["name"])
+        # the ampersand flag and the source type are part of the key
+        encoded = JSON(text, encode_ampersands=True, cache=cache)
+        self.assertEqual("Joe &amp; Sons", encoded.data["name"])
+        self.assertEqual(2, len(cache))
+        with tempfile.TemporaryDirectory() as folder:
+            path = Path(folder, "data.json")
+            path.write_text(text, encoding="utf-8-sig")
+            for _ in range(3):
+                self.assertEqual(first.data, JSON(cache=cache).from_json_file(str(path)).data)
+            self.assertEqual({"hits": 3, "misses": 3, "entries": 3}, {k: v for k, v in cache.stats().items()
+                                                                       if k != "bytes"})
+            # an unchanged file isn't read again
+            with unittest.mock.patch("builtins.open", side_effect=AssertionError("read")):
+                JSON(cache=cache).from_json_file(str(path))
+            # a changed file is
+            path.write_text('{"name": "Jane"}')
+            self.assertEqual({"name": "Jane"}, JSON(cache=cache).from_json_file(str(path)).data)
+            path.write_text("")
+            self.assertIsNone(JSON(cache=cache).from_json_file(str(path)).data)
+
+    def test_xml_cache(self):
+        cache = data.ParseCache()
+        text = '<root><a id="1">Joe & Sons</a></root>'
+        first = XML(text, encode_ampersands=True, cache=cache)
+        second = XML(text, encode_ampersands=True, cache=cache)
+        self.assertEqual(first.to_dict(), second.to_dict())
+        self.assertEqual({"hits": 1, "misses": 1}, {k: cache.stats()[k] for k in ("hits", "misses")})
+        # loads share the cached tree copy on write: data is a private copy so the cached entry can't be changed
+        self.assertIsNot(first.data, second.data)
+        first.data.find("a").text = "changed"
+        self.assertEqual("changed", first.to_dict()["root"]["a"]["#text"])
+        self.assertEqual("Joe & Sons", XML(text, encode_ampersands=True, cache=cache).to_dict()["root"]["a"]["#text"])
+        self.assertEqual("Joe & Sons", second.data.find("a").text)
+        first.data = Etree.fromstring("<other/>")
+        self.assertEqual({"other": None}, first.to_dict())
+        with tempfile.TemporaryDirectory() as folder:
+            path = Path(folder, "data.xml")
+            path.write_text(text, encoding="utf-8")
+            loaded = [XML(encode_ampersands=True, cache=cache).from_xml_file(str(path)) for _ in range(2)]
+            self.assertEqual(second.to_dict(), loaded[0].to_dict())
+            loaded[0].data.find("a").set("id", "changed")
+            self.assertEqual("1", loaded[1].data.find("a").get("id"))
+        self.assertEqual(3, cache.hits)
+        # parse errors are not cached
+        with self.assertRaises(Etree.ParseError):
+            XML("<root>", cache=cache)
 
+    def test_eviction(self):
+        cache = data.ParseCache(max_bytes=100)
+        texts = [json.dumps({"id": i, "pad": "x" * 20}) for i in range(6)]
+        for text in texts:
+            JSON(text, cache=cache)
+        self.assertEqual(80, cache.size)
+        self.assertEqual(2, len(cache))
+        # the least recently used entries were dropped
+        JSON(texts[-1], cache=cache)
+        JSON(texts[0], cache=cache)
+        self.assertEqual({"hits": 1, "misses": 7}, {k: cache.stats()[k] for k in ("hits", "misses")})
+        # a source larger than the cache is parsed but not cached
+        JSON(json.dumps({"pad": "x" * 200}), cache=cache)
+        self.assertEqual(2, len(cache))
+        # file stat records are dropped with their evicted entries
+        with tempfile.TemporaryDirectory() as folder:
+            for i, text in enumerate(texts):
+                path = Path(folder, f"{i}.json")
+                path.write_text(text, encoding="utf-8")
+                JSON(cache=cache).from_json_file(str(path))
+            self.assertEqual(2, len(cache))
+            self.assertEqual(2, len(cache._files))
+            # a file larger than the cache isn't remembered
+            path = Path(folder, "big.json")
+            path.write_text(json.dumps({"pad": "x" * 200}), encoding="utf-8")
+            JSON(cache=cache).from_json_file(str(path))
+            self.assertEqual(2, len(cache._files))
+        cache.clear()
+        self.assertEqual({"hits": 0, "misses": 0, "entries": 0, "bytes": 0}, cache.stats())
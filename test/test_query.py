@@ -0,0 +1,74 @@
+import unittest
+
+from ubercode.utils import query
+from ubercode.utils.data import JSON, XML
+
+
+class TestQuery(unittest.TestCase):
+    ORDERS = {
+        "orders": [
+            {"id": 1, "customer": {"name": "Joe"}, "items": [{"sku": "a", "qty": 1}, {"sku": "b", "qty": 3}]},
+            {"id": 2, "customer": {"name": "Emily"}, "items": [{"sku": "c", "qty": 5, "note": None}]},
+            {"id": 3, "customer": {"name": "James"}, "items": []},
+        ],
+        "totals": {"count": 3, "odd key.name": "x"},
+    }
+
+    # -------- common usages ----------
+    def test_select(self):
+        data = self.ORDERS
+        self.assertEqual(["b", "c"], list(query.select("orders[*].items[?qty>2].sku", data)))
+        self.assertEqual(["a", "b", "c"], list(query.select("orders[*].items[*].sku", data)))
+        # a key applied to a list is applied to each item
+        self.assertEqual([1, 2, 3], list(query.select("orders.id", data)))
+        self.assertEqual("James", query.first("orders[-1].customer.name", data))
+        self.assertEqual(["Emily"], list(query.select("orders[?customer.name=='Emily'].customer.name", data)))
+        self.assertEqual([1, 3], list(query.select('orders[?customer.name != "Emily"].id', data)))
+        self.assertEqual([3, "x"], list(query.select("totals.*", data)))
+        self.assertEqual(["x"], list(query.select("totals['odd key.name']", data)))
+        self.assertEqual([data], list(query.select("$", data)))
+        self.assertEqual([1], list(query.select("$.orders[0].id", data)))
+        # existence filters skip missing and None values
+        self.assertEqual([], list(query.select("orders[*].items[?note].sku", data)))
+        self.assertEqual(["a", "b", "c"], list(query.select("orders[*].items[?sku].sku", data)))
+        # nothing matches
+        self.assertEqual([], list(query.select("orders[5].id", data)))
+        self.assertEqual("none", query.first("missing.key", data, default="none"))
+        # results are the original objects and not copies
+        self.assertIs(data["orders"][0], query.first("orders[0]", data))
+
+    def test_compile(self):
+        plan = query.compile("orders[*].items[?qty>=3].sku")
+        # plans are cached by expression string and reusable
+        self.assertIs(plan, query.compile("orders[*].items[?qty>=3].sku"))
+        self.assertEqual(["b", "c"], list(plan.select(self.ORDERS)))
+        self.assertEqual(["b", "c"], list(plan.select(self.ORDERS)))
+        # evaluation is lazy
+        selection = plan.select(self.ORDERS)
+        self.assertEqual("b", next(selection))
+        for expression in ("orders[", "orders[?]", "orders[?qty>]", "orders..id", "orders[abc]", "orders]"):
+            with self.assertRaises(ValueError, msg=expression):
+                query.compile(expression)
+
+    def test_data(self):
+        json = JSON('{"people": [{"name": "Joe", "age": 28}, {"name": "Emily", "age": 24}]}')
+        self.assertEqual(["Joe"], list(json.select("people[?age>25].name")))
+        xml = XML("""
+<contacts>
+    <contact id="1"><name>Steve</name><age>50</age></contact>
+    <contact id="2"><name>Buggs</name><age>80</age></contact>
+    <group><contact id="3"><name>Daffy</name><age>85</age></contact></group>
+</contacts>""")
+        # xml attributes and text are strings but still compare against numbers
+        self.assertEqual(["Buggs"], list(xml.select("contacts.contact[?@id==2].name")))
+        self.assertEqual(["Buggs"], list(xml.select("contacts.contact[?age>60].name")))
+        # a single element works the same as repeated ones
+        self.assertEqual(["Daffy"], list(xml.select("contacts.group.contact[*].name")))
+        self.assertEqual(["Daffy"], list(xml.select("contacts.group.contact[?age>60].name")))
+        self.assertEqual(["Daffy"], list(xml.select("contacts.group.contact[0].name")))
+        xml = XML('<items><item sku="a">first</item><item sku="b">second</item></items>')
+        self.assertEqual(["second"], list(xml.select("items.item[?@sku=='b'].#text")))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,13 +1,28 @@
 """
 A collection of conversion utilities that can be used without circular dependencies.
 """
+import contextvars
 import re
+import threading
+from array import array
+from collections import OrderedDict
+from contextlib import contextmanager
+from functools import lru_cache
+from operator import itemgetter
 from typing import List, Any
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 from pprint import pprint
 
+# numpy is optional; when installed the batch conversions can return numpy arrays and convert numeric arrays directly
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 # basic boolean true or false values
 # NOTE: we will assume a to_lower conversion
+# NOTE: to_bool/is_true look values up in sets built from these lists; use register_bool_tokens() to add values (or
+#   call it without arguments after changing the lists directly) so the sets are rebuilt
 TRUE_VALUES = [True, 1, "1", "y", "t", "true", "yes", "on"]
 FALSE_VALUES = [None, False, 0, "0", "n", "f", "false", "no", "off"]
 
@@ -80,6 +95,65 @@ def to_str(value: Any, none_to_empty: bool = True) -> str:
     return str(value)
 
 
+def _bool_table(values: list) -> frozenset:
+    """ lookup set of the hashable values in a TRUE_VALUES/FALSE_VALUES list """
+    return frozenset(value for value in values if value.__hash__ is not None)
+
+
+# a canonical int string: one optional leading - then digits (str(int(value)) == value filters out "007" and "-0")
+_INT_STRING = re.compile(r"-?[0-9]+\Z")
+
+
+def _int_table(values: list, table: frozenset) -> frozenset:
+    """
+    lookup set for ints: the table plus the int strings as ints ("0" -> 0) so an int is found with one lookup instead
+    of converting it with str() first
+    """
+    return table.union(int(value) for value in values
+                       if isinstance(value, str) and _INT_STRING.match(value) and str(int(value)) == value)
+
+
+def _lookup(value, values: list, table: frozenset) -> bool:
+    """ is value (or its lower case str) one of values; same result as the list membership tests it replaces """
+    try:
+        if value in table:
+            return True
+    except TypeError:
+        # unhashable values can only be compared one by one
+        if value in values:
+            return True
+    return str(value).lower() in table
+
+
+def _build_bool_tables() -> None:
+    global _TRUE_TABLE, _FALSE_TABLE, _TRUE_INTS, _FALSE_INTS, _BOOL_RESULTS, _IS_TRUE_RESULTS
+    _TRUE_TABLE = _bool_table(TRUE_VALUES)
+    _FALSE_TABLE = _bool_table(FALSE_VALUES)
+    _TRUE_INTS = _int_table(TRUE_VALUES, _TRUE_TABLE)
+    _FALSE_INTS = _int_table(FALSE_VALUES, _FALSE_TABLE)
+    # True/False/None always give the same answer so they are computed once per rebuild
+    _BOOL_RESULTS = {value: not _lookup(value, FALSE_VALUES, _FALSE_TABLE) and bool(value)
+                     for value in (True, False, None)}
+    _IS_TRUE_RESULTS = {value: _lookup(value, TRUE_VALUES, _TRUE_TABLE) for value in (True, False)}
+
+
+def register_bool_tokens(true=(), false=()) -> None:
+    """
+    Add values (ex: locale words like "ja"/"nein") recognized by to_bool and is_true and rebuild the lookup tables
+    NOTE: strings are stored lower case since values are matched after a to_lower conversion; call without arguments
+        to rebuild the tables after changing TRUE_VALUES/FALSE_VALUES directly
+    :param true: values added to TRUE_VALUES
+    :param false: values added to FALSE_VALUES
+    :return: None
+    """
+    for values, tokens in ((TRUE_VALUES, true), (FALSE_VALUES, false)):
+        for token in tokens:
+            token = token.lower() if isinstance(token, str) else token
+            if token not in values:
+                values.append(token)
+    _build_bool_tables()
+
+
 def to_bool(value) -> bool:
     """
     Convert <value> to boolean.  Mainly handles returning false values passed as parameters which
@@ -88,8 +162,17 @@ def to_bool(value) -> bool:
     :param value: expects int, bool, string or None
     :return: python True/False value
     """
-    # note: need this line because strings and numbers are truthy and will return true
-    if value in FALSE_VALUES or str(value).lower() in FALSE_VALUES:
+    # note: need the lookups because strings and numbers are truthy and will return true
+    if value is None:
+        return _BOOL_RESULTS[None]
+    kind = type(value)
+    if kind is str:
+        return not (value in _FALSE_TABLE or value.lower() in _FALSE_TABLE) and value != ""
+    if kind is bool:
+        return _BOOL_RESULTS[value]
+    if kind is int:
+        return value not in _FALSE_INTS and value != 0
+    if _lookup(value, FALSE_VALUES, _FALSE_TABLE):
         return False
     return bool(value)
 
@@ -103,10 +186,19 @@ def is_true(value: int or bool or str) -> bool:
     :param value: expects int, bool, string or None
     :return: python True/False value
     """
-    if value is not None:
-        if value in TRUE_VALUES or str(value).lower() in TRUE_VALUES:
-            return True
-    return False
+    if value is None:
+        return False
+    kind = type(value)
+    if kind is str:
+        return value in _TRUE_TABLE or value.lower() in _TRUE_TABLE
+    if kind is bool:
+        return _IS_TRUE_RESULTS[value]
+    if kind is int:
+        return value in _TRUE_INTS
+    return _lookup(value, TRUE_VALUES, _TRUE_TABLE)
+
+
+_build_bool_tables()
 
 
 def to_js_bool(bool_value: bool) -> str:
@@ -169,42 +261,255 @@ def to_iso8601(value: datetime = None, tz: timezone = None) -> str:
     return value.isoformat(timespec='seconds')
 
 
-def from_iso8601_compact(value: Any = None, tz: timezone = timezone.utc):
-    _value = value
-    if isinstance(value, str):
-        if len(value.strip()) == 0:
+# one pass iso8601 parser: calendar (20240131), week (2024W053) or ordinal (2024031) dates
+#   each with optional - separators then an optional T time (hour, minute, second each with
+#   optional : separators), . or , fraction and Z/+-hh[mm] offset
+_ISO8601 = re.compile(r"""
+    (?P<year>\d{4})
+    (?:-?(?P<month>\d{2})-?(?P<day>\d{2})
+      |-?W(?P<week>\d{2})-?(?P<weekday>[1-7])
+      |-?(?P<ordinal>\d{3}))
+    (?:T(?P<hour>\d{2})
+        (?::?(?P<minute>\d{2})(?::?(?P<second>\d{2})(?:[.,](?P<fraction>\d{1,6}))?)?)?
+        (?:(?P<utc>Z)|(?P<sign>[-+])(?P<offset_hour>\d{2})(?::?(?P<offset_minute>\d{2}))?)?
+    )?\Z""", re.VERBOSE | re.IGNORECASE)
+
+
+# separators of a 2024-01-31T08:10:30 string and a table removing them (plus the T) to check the rest are digits
+_EXTENDED_SEPARATORS = itemgetter(4, 7, 13, 16)
+_NO_SEPARATORS = str.maketrans("", "", "-:Tt")
+
+
+@lru_cache(maxsize=None)
+def _utc_offset(sign: str, hours: str, minutes: str or None) -> timezone:
+    """ timezone for a parsed offset; there are only a few distinct ones so each is created once """
+    offset = timedelta(hours=int(hours), minutes=int(minutes or 0))
+    return timezone(-offset if sign == "-" else offset)
+
+
+def _parse_iso8601(value: str, tz: timezone or None = None) -> datetime or None:
+    """
+    Parse an iso8601 string in one pass (shared by from_iso8601_compact and to_date); the most common fixed width
+    shapes are detected from the length and separators and sliced directly, everything else is one regex match
+    :param value: iso8601 string
+    :param tz: timezone for strings without an offset (None leaves them naive)
+    :return: datetime or None if value isn't a valid iso8601 string
+    """
+    length = len(value)
+    try:
+        # 20240131T081030, 2024-01-31T08:10:30 and 20240131
+        if length == 15 and value[8] in "Tt" and value[:8].isdigit() and value[9:].isdigit():
+            return datetime(int(value[:4]), int(value[4:6]), int(value[6:8]), int(value[9:11]), int(value[11:13]),
+                            int(value[13:]), 0, tz)
+        if length == 19 and value[10] in "Tt" and _EXTENDED_SEPARATORS(value) == ("-", "-", ":", ":") and \
+                value.translate(_NO_SEPARATORS).isdigit():
+            return datetime(int(value[:4]), int(value[5:7]), int(value[8:10]), int(value[11:13]), int(value[14:16]),
+                            int(value[17:]), 0, tz)
+        if length == 8 and value.isdigit():
+            return datetime(int(value[:4]), int(value[4:6]), int(value[6:]), tzinfo=tz)
+        match = _ISO8601.match(value)
+        if not match:
             return None
-        # remove colons and dashes EXCEPT for the dash indicating + or - utc offset for the timezone
-        conformed_timestamp = re.sub(r"[:]|([-](?!((\d{2}[:]\d{2})|(\d{4}))$))", "", value)
-        _value = None
+        year, month, day, week, weekday, ordinal, hour, minute, second, fraction, utc, sign, offset_hour, \
+            offset_minute = match.groups()
+        if utc:
+            tz = timezone.utc
+        elif sign:
+            tz = _utc_offset(sign, offset_hour, offset_minute)
+        if month:
+            return datetime(int(year), int(month), int(day), int(hour or 0), int(minute or 0), int(second or 0),
+                            int(fraction.ljust(6, "0")) if fraction else 0, tz)
+        if week:
+            date = datetime.fromisocalendar(int(year), int(week), int(weekday))
+        else:
+            year, ordinal = int(year), int(ordinal)
+            if not 0 < ordinal <= (366 if year % 4 == 0 and (year % 100 != 0 or year % 400 == 0) else 365):
+                return None
+            date = datetime(year, 1, 1) + timedelta(days=ordinal - 1)
+        return date.replace(hour=int(hour or 0), minute=int(minute or 0), second=int(second or 0),
+                            microsecond=int(fraction.ljust(6, "0")) if fraction else 0, tzinfo=tz)
+    except (ValueError, OverflowError):
+        return None
+
+
+def _from_iso8601_strptime(value: str) -> datetime:
+    """ the original strptime cascade; catches the unusual shapes strptime accepts (ex: single digit months) """
+    # remove colons and dashes EXCEPT for the dash indicating + or - utc offset for the timezone
+    conformed_timestamp = re.sub(r"[:]|([-](?!((\d{2}[:]\d{2})|(\d{4}))$))", "", value)
+    for pattern in ("%Y%m%dT%H%M%S.%f%z", "%Y%m%dT%H%M%S.%f", "%Y%m%dT%H%M%S", "%Y%m%dT%H%M", "%Y%m%dT%H", "%Y%m%d"):
         try:
-            _value = datetime.strptime(conformed_timestamp, "%Y%m%dT%H%M%S.%f%z")
+            return datetime.strptime(conformed_timestamp, pattern)
         except ValueError:
-            try:
-                _value = datetime.strptime(conformed_timestamp, "%Y%m%dT%H%M%S.%f")
-            except ValueError:
-                try:
-                    _value = datetime.strptime(conformed_timestamp, "%Y%m%dT%H%M%S")
-                except ValueError:
-                    try:
-                        _value = datetime.strptime(conformed_timestamp, "%Y%m%dT%H%M")
-                    except ValueError:
-                        try:
-                            _value = datetime.strptime(conformed_timestamp, "%Y%m%dT%H")
-                        except ValueError:
-                            try:
-                                _value = datetime.strptime(conformed_timestamp, "%Y%m%d")
-                            except ValueError:
-                                raise ValueError(f"DateTime string [{value}] did not match an expected pattern.")
-    if tz and isinstance(_value, datetime) and not _value.tzinfo:
+            pass
+    raise ValueError(f"DateTime string [{value}] did not match an expected pattern.")
+
+
+# -------- date parse cache --------
+# number of parsed date strings kept by a DateCache by default
+DEFAULT_DATE_CACHE_SIZE = 4096
+# marks a cached string that isn't a date
+_INVALID = object()
+_MISSING = object()
+
+
+class DateCache:
+    """
+    Bounded, thread safe LRU cache of parsed date strings keyed on (string, tz) for to_date and from_iso8601_compact.
+    Log and event data repeats the same timestamps over and over so each distinct one is parsed once; datetimes are
+    immutable so cached results are shared safely.  Activate one with date_cache() or enable_date_cache().
+    """
+    def __init__(self, maxsize: int = DEFAULT_DATE_CACHE_SIZE):
+        """
+        :param maxsize: number of parsed strings kept; least recently used are dropped
+        """
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def lookup(self, key: tuple, parse, *args):
+        """
+        :param key: (function, string, tz) key
+        :param parse: function returning the value to cache on a miss
+        :param args: arguments for parse
+        :return: cached value
+        """
+        with self._lock:
+            value = self._entries.get(key, _MISSING)
+            if value is not _MISSING:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            self.misses += 1
+        value = parse(*args)
+        with self._lock:
+            self._entries[key] = value
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return value
+
+    def stats(self) -> dict:
+        """
+        :return: dict of hits, misses, hit_rate (0.0 - 1.0) and size (number of cached strings)
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {'hits': self.hits, 'misses': self.misses, 'hit_rate': self.hits / lookups if lookups else 0.0,
+                    'size': len(self._entries)}
+
+    def clear(self) -> None:
+        """ drop every entry and reset the counters """
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+
+_date_cache = contextvars.ContextVar('date_cache', default=None)
+_global_date_cache = None
+
+
+def get_date_cache() -> DateCache or None:
+    """
+    :return: the DateCache active in this context (see date_cache) or the global one (see enable_date_cache) or None
+    """
+    cache = _date_cache.get()
+    return cache if cache is not None else _global_date_cache
+
+
+def enable_date_cache(maxsize: int = DEFAULT_DATE_CACHE_SIZE) -> DateCache:
+    """
+    Globally cache parsed date strings (every thread and context without its own date_cache)
+    :param maxsize: number of parsed strings kept
+    :return: the new global DateCache (for its stats)
+    """
+    global _global_date_cache
+    _global_date_cache = DateCache(maxsize)
+    return _global_date_cache
+
+
+def disable_date_cache() -> None:
+    """ stop the global date cache started by enable_date_cache """
+    global _global_date_cache
+    _global_date_cache = None
+
+
+@contextmanager
+def date_cache(cache: DateCache or None = None, maxsize: int = DEFAULT_DATE_CACHE_SIZE):
+    """
+    Cache parsed date strings inside a with block (the current thread / async context only)
+    Ex: with convert.date_cache() as cache: rows = [convert.to_date(value) for value in values]; cache.stats()
+    :param cache: DateCache to use (ex: one shared across batches); a new one is created if None
+    :param maxsize: number of parsed strings kept by a new cache
+    :return: context manager yielding the DateCache
+    """
+    cache = cache if cache is not None else DateCache(maxsize)
+    token = _date_cache.set(cache)
+    try:
+        yield cache
+    finally:
+        _date_cache.reset(token)
+
+
+# -------- date conversions (continued) --------
+def _from_iso8601_string(value: str, tz: timezone or None):
+    """ from_iso8601_compact of a string: datetime, None for a blank string or _INVALID """
+    _value = _parse_iso8601(value, tz)
+    if _value is not None:
+        return _value
+    if len(value.strip()) == 0:
+        return None
+    try:
+        _value = _from_iso8601_strptime(value)
+    except ValueError:
+        return _INVALID
+    if tz and not _value.tzinfo:
         _value = _value.replace(tzinfo=tz)
     return _value
 
 
+def from_iso8601_compact(value: Any = None, tz: timezone = timezone.utc):
+    """
+    Convert a basic (compact) or extended iso8601 string to a datetime; calendar, week (2024W053) and ordinal
+    (2024031) dates are supported with an optional time, fraction and offset.  Strings that don't fit the one pass
+    parser fall back to the original strptime patterns.
+    :param value: iso8601 string (anything else is returned as is)
+    :param tz: timezone for strings without an offset (defaults to timezone.utc)
+    :return: datetime, None for a blank string or the original value; raises ValueError if the string isn't a date
+    """
+    if isinstance(value, str):
+        cache = get_date_cache()
+        if cache is not None:
+            _value = cache.lookup((from_iso8601_compact, value, tz), _from_iso8601_string, value, tz)
+        else:
+            _value = _from_iso8601_string(value, tz)
+        if _value is _INVALID:
+            raise ValueError(f"DateTime string [{value}] did not match an expected pattern.")
+        return _value
+    if tz and isinstance(value, datetime) and not value.tzinfo:
+        value = value.replace(tzinfo=tz)
+    return value
+
+
+def _to_date_string(value: str, tz: timezone or None):
+    """ to_date of a string: datetime, None for a blank string or _INVALID """
+    try:
+        value = datetime.fromisoformat(value)
+    except ValueError:
+        return _from_iso8601_string(value, tz)
+    if tz and not value.tzinfo:
+        value = value.replace(tzinfo=tz)
+    return value
+
+
 def to_date(value: Any = None, tz: timezone or None = timezone.utc, none_to_now: bool = True, suppress_warnings: bool = True):
     """
     Convert string to python date.  Currently, only concerned about iso8601 and db type formats.
     None returns current date by default but can be overridden with none_to_now optional parameter
+    NOTE: strings are looked up in the active DateCache first if there is one (see date_cache)
     :param value: string value for date (currently only iso8601)
     :param tz: timezone (defaults to timezone.utc)
     :param none_to_now: override the default to return now if none is passed; primarily for db operations to store null
@@ -217,20 +522,334 @@ def to_date(value: Any = None, tz: timezone or None = timezone.utc, none_to_now:
         else:
             return None
     if isinstance(value, str):
-        try:
-            value = datetime.fromisoformat(value)
-        except ValueError:
-            try:
-                value = from_iso8601_compact(value)
-            except ValueError:
-                if not suppress_warnings:
-                    print(f"WARNING: exception converting value {str(value)} to date; returning None!")
-                return None
+        cache = get_date_cache()
+        if cache is not None:
+            result = cache.lookup((to_date, value, tz), _to_date_string, value, tz)
+        else:
+            result = _to_date_string(value, tz)
+        if result is _INVALID:
+            if not suppress_warnings:
+                print(f"WARNING: exception converting value {str(value)} to date; returning None!")
+            return None
+        return result
     if tz and isinstance(value, datetime) and not value.tzinfo:
         value = value.replace(tzinfo=tz)
     return value
 
 
+# -------- batch conversions --------
+# NOTE: the *_many functions give exactly the results of calling the scalar function on each value but check their
+#   options once per batch instead of once per value; output is 'list', 'array' (array.array) or 'numpy'
+BATCH_OUTPUTS = ('list', 'array', 'numpy')
+
+
+def _batch_values(values, output: str) -> list or tuple:
+    if output not in BATCH_OUTPUTS:
+        raise ValueError(f"Batch output [{output}] must be one of {list(BATCH_OUTPUTS)}!")
+    if isinstance(values, (list, tuple)):
+        return values
+    if numpy is not None and isinstance(values, numpy.ndarray):
+        return values.tolist()
+    return list(values)
+
+
+def _batch_output(result: list, output: str, typecode: str or None = None, dtype=object):
+    """
+    :param result: converted values
+    :param output: 'list', 'array' or 'numpy'
+    :param typecode: array.array typecode (None when the results can't be stored in an array)
+    :param dtype: numpy dtype used when no result is None
+    :return: result in the requested output type
+    """
+    if output == 'list':
+        return result
+    if output == 'array':
+        if typecode is None:
+            raise ValueError("Batch output [array] is only supported for int and bool results!")
+        return array(typecode, result)
+    if numpy is None:
+        raise ImportError("Batch output [numpy] requires numpy!")
+    if dtype is not object and None in result:
+        dtype = object
+    return numpy.array(result, dtype=dtype)
+
+
+def _numpy_kind(values) -> str or None:
+    """ numpy dtype kind (b: bool, i/u: int, f: float) of a numpy array or None for anything else """
+    if numpy is not None and isinstance(values, numpy.ndarray) and values.ndim == 1:
+        return values.dtype.kind
+    return None
+
+
+def to_int_many(values, default: int = 0, none_to_default: bool = True, suppress_warnings: bool = True,
+                output: str = 'list'):
+    """
+    Convert each value with to_int (same options and results)
+    :param values: iterable or sequence of values (numpy bool/int arrays are converted without a python loop)
+    :param default: value to use if none or error
+    :param none_to_default: preserve None values or convert them to the default
+    :param suppress_warnings: suppress the warning message printed for each value that can't be converted
+    :param output: 'list', 'array' (array('q'); every result must be an int) or 'numpy' (int64 unless a result is None)
+    :return: converted values
+    """
+    kind = _numpy_kind(values)
+    # unsigned 64 bit values may not fit in an int64 so they take the python path
+    if (kind in ('b', 'i') or kind == 'u' and values.dtype.itemsize < 8) and output != 'array':
+        result = values.astype(numpy.int64)
+        return result if output == 'numpy' else result.tolist()
+    values = _batch_values(values, output)
+    if not suppress_warnings:
+        result = [to_int(value, default, none_to_default, suppress_warnings) for value in values]
+    else:
+        none_result = to_int(None, default, none_to_default)
+        try:
+            # most batches are all valid; convert them without a per value exception handler (None fails int())
+            result = list(map(int, values))
+        except Exception:
+            result = []
+            append = result.append
+            for value in values:
+                if value is None:
+                    append(none_result)
+                    continue
+                try:
+                    append(int(value))
+                except Exception:
+                    append(default)
+    return _batch_output(result, output, 'q', numpy.int64 if numpy is not None else None)
+
+
+def _float_token(token: str) -> bool:
+    """ can a false token match str(value).lower() of a float (ex: 'nan', '1.5' but not '0' or '1') """
+    try:
+        return str(float(token)).lower() == token
+    except ValueError:
+        return False
+
+
+def _numpy_to_bool(values, kind: str):
+    """
+    to_bool of a numpy bool/int/float array as a numpy bool array; values != 0 unless registered false tokens
+    (see register_bool_tokens) can match the array values
+    """
+    if kind == 'b':
+        return numpy.where(values, _BOOL_RESULTS[True], _BOOL_RESULTS[False])
+    # numbers in the false table (bools and ints compare equal to the numbers they stand for)
+    numbers = [value for value in _FALSE_INTS if isinstance(value, (int, float)) and value != 0]
+    if kind in ('i', 'u'):
+        # ints are only looked up in _FALSE_INTS (see to_bool)
+        result = values != 0
+        if numbers:
+            result &= ~numpy.isin(values, numbers)
+        return result
+    if not numbers and not any(isinstance(token, str) and _float_token(token) for token in _FALSE_TABLE):
+        return values != 0
+    # floats are also matched by their str() so convert each distinct value with to_bool
+    unique, inverse = numpy.unique(values, return_inverse=True)
+    return numpy.array([to_bool(value) for value in unique.tolist()], dtype=bool)[inverse]
+
+
+def to_bool_many(values, output: str = 'list'):
+    """
+    Convert each value with to_bool (same results)
+    :param values: iterable or sequence of values (numpy bool/int/float arrays are converted without a python loop)
+    :param output: 'list', 'array' (array('b') of 0/1) or 'numpy' (bool array)
+    :return: converted values
+    """
+    kind = _numpy_kind(values)
+    if kind in ('b', 'i', 'u', 'f') and output != 'array':
+        result = _numpy_to_bool(values, kind)
+        return result if output == 'numpy' else result.tolist()
+    values = _batch_values(values, output)
+    # strings repeat a lot (y/n, true/false) so each distinct one is only looked up once
+    seen = {}
+    result = []
+    append = result.append
+    for value in values:
+        if type(value) is str:
+            converted = seen.get(value)
+            if converted is None:
+                converted = seen[value] = to_bool(value)
+            append(converted)
+        else:
+            append(to_bool(value))
+    return _batch_output(result, output, 'b', numpy.bool_ if numpy is not None else None)
+
+
+def to_none_many(values, values_to_convert: List[str] = ('None', ''), strip_value=True, output: str = 'list'):
+    """
+    Convert each value with to_none (same options and results)
+    :param values: iterable or sequence of values
+    :param values_to_convert: values to convert if matched
+    :param strip_value: strip the value if possible (default True)
+    :param output: 'list' or 'numpy' (object array)
+    :return: converted values
+    """
+    values = _batch_values(values, output)
+    try:
+        matches = frozenset(values_to_convert)
+    except TypeError:
+        matches = values_to_convert
+    result = []
+    append = result.append
+    for value in values:
+        if strip_value:
+            value = value.strip() if type(value) is str else strip(value)
+        append(None if (value if type(value) is str else str(value)) in matches else value)
+    return _batch_output(result, output)
+
+
+def to_date_many(values, tz: timezone or None = timezone.utc, none_to_now: bool = True,
+                 suppress_warnings: bool = True, output: str = 'list'):
+    """
+    Convert each value with to_date (same options and results)
+    :param values: iterable or sequence of values
+    :param tz: timezone (defaults to timezone.utc)
+    :param none_to_now: return now for None values (each None gets its own now like separate to_date calls)
+    :param suppress_warnings: suppress warning messages for values that can't be converted
+    :param output: 'list' or 'numpy' (object array of aware datetimes)
+    :return: converted values
+    """
+    values = _batch_values(values, output)
+    if get_date_cache() is not None:
+        # the active cache already skips parsing repeated strings
+        return _batch_output([to_date(value, tz, none_to_now, suppress_warnings) for value in values], output)
+    fromisoformat = datetime.fromisoformat
+    result = []
+    append = result.append
+    for value in values:
+        if type(value) is str:
+            try:
+                value = fromisoformat(value)
+            except ValueError:
+                append(to_date(value, tz, none_to_now, suppress_warnings))
+                continue
+        elif value is None or not isinstance(value, datetime):
+            append(to_date(value, tz, none_to_now, suppress_warnings))
+            continue
+        if tz and not value.tzinfo:
+            value = value.replace(tzinfo=tz)
+        append(value)
+    return _batch_output(result, output)
+
+
+# -------- columnar date parsing --------
+# number of strings parse_dates checks when picking a parser for a column
+PARSE_DATES_SAMPLE = 20
+
+
+def _date_parsers(tz: timezone or None, sample: list) -> list:
+    """
+    Candidate parsers for a column, fastest first; each takes a string and returns a datetime or raises ValueError /
+    returns None when the string doesn't fit it
+    :param tz: timezone for strings without an offset
+    :param sample: the sample date strings the parser is picked for
+    :return: list of parsers
+    """
+    fromisoformat = datetime.fromisoformat
+
+    def isoformat(value):
+        value = fromisoformat(value)
+        if tz and not value.tzinfo:
+            return value.replace(tzinfo=tz)
+        return value
+
+    parsers = []
+    # the sample strings share one fixed width shape: same length, separators and a final digit
+    length = len(sample[0])
+    positions = tuple(index for index, char in enumerate(sample[0]) if not char.isdigit())
+    separators = itemgetter(*positions) if positions else lambda value: ()
+    shape = separators(sample[0])
+    if isinstance(tz, timezone) and sample[0][-1].isdigit() and \
+            all(len(value) == length and separators(value) == shape and value[-1].isdigit() for value in sample):
+        # appending a fixed offset (ex: +00:00) lets fromisoformat attach it much faster than replace(tzinfo=) does;
+        #   only when the resulting timezone is indistinguishable from tz (same offset and name)
+        suffix = datetime(2000, 1, 1, tzinfo=tz).isoformat()[19:]
+        probe = fromisoformat("2000-01-01T00:00:00" + suffix)
+        if probe.tzinfo == tz and probe.tzname() == tz.tzname(None):
+            midnight = "T00:00:00" + suffix
+
+            # fromisoformat skips one character before an offset so only strings of exactly the sample shape get
+            #   the suffix (ex: 2024-01-31T08:10:30x+00:00 parses); anything else is parsed without it
+            def with_suffix(value):
+                if len(value) == length and separators(value) == shape and value[-1].isdigit():
+                    return fromisoformat(value + suffix)
+                return isoformat(value)
+
+            def with_midnight(value):
+                if len(value) == length and separators(value) == shape and value[-1].isdigit():
+                    return fromisoformat(value + midnight)
+                return isoformat(value)
+            parsers.append(with_suffix)
+            parsers.append(with_midnight)
+    # strings with their own offset (parse_dates sends naive results to to_date)
+    parsers.append(fromisoformat)
+    parsers.append(isoformat)
+    parsers.append(lambda value: _parse_iso8601(value, tz))
+    return parsers
+
+
+def _infer_date_parser(sample: list, tz: timezone or None):
+    """
+    :param sample: a few non blank strings from the column
+    :param tz: timezone for strings without an offset
+    :return: the fastest parser giving the to_date result for every sample date string or None if none of them do
+    """
+    # strings that aren't dates at all don't say anything about the format
+    expected = [to_date(value, tz, False) for value in sample]
+    sample = [value for value, result in zip(sample, expected) if result is not None]
+    expected = [result for result in expected if result is not None]
+    if not sample:
+        return None
+    for parser in _date_parsers(tz, sample):
+        try:
+            results = [parser(value) for value in sample]
+        except (ValueError, TypeError):
+            continue
+        # equal datetimes can still differ in timezone name (or be naive vs aware)
+        if results == expected and all(result.tzname() == value.tzname() for result, value in zip(results, expected)):
+            return parser
+    return None
+
+
+def parse_dates(values, tz: timezone or None = timezone.utc, none_to_now: bool = False,
+                suppress_warnings: bool = True, sample_size: int = PARSE_DATES_SAMPLE, output: str = 'list'):
+    """
+    Convert a column of date strings (ex: a csv or query column) with the same results as to_date; the format is
+    inferred from the first few strings and one parser chosen for it is applied to every value, only values it
+    doesn't fit (other formats, blanks, None, datetimes) go through to_date
+    Ex: convert.parse_dates(["2024-01-31T08:10:30", "2024-02-01T09:00:00", None])
+    :param values: iterable or sequence of values
+    :param tz: timezone (defaults to timezone.utc)
+    :param none_to_now: return now for None values (defaults to False; a missing value stays missing)
+    :param suppress_warnings: suppress warning messages for values that can't be converted
+    :param sample_size: number of non blank strings used to infer the format
+    :param output: 'list' or 'numpy' (object array of aware datetimes)
+    :return: converted values
+    """
+    values = _batch_values(values, output)
+    sample = []
+    for value in values:
+        if isinstance(value, str) and value.strip():
+            sample.append(value)
+            if len(sample) >= sample_size:
+                break
+    parser = _infer_date_parser(sample, tz) if sample else None
+    if parser is None:
+        return _batch_output([to_date(value, tz, none_to_now, suppress_warnings) for value in values], output)
+    result = []
+    append = result.append
+    for value in values:
+        try:
+            _value = parser(value)
+        except (ValueError, TypeError):
+            _value = None
+        if _value is None or (tz and not _value.tzinfo):
+            _value = to_date(value, tz, none_to_now, suppress_warnings)
+        append(_value)
+    return _batch_output(result, output)
+
+
 # -------- helper conversions --------
 def to_mask(value: str or None) -> str or None:
     _mask = value
@@ -1,42 +1,812 @@
 """
 A collection of database cursor conversion utilities.
 """
-from collections import namedtuple
+import csv
+import io
+import json
+import keyword
+import mmap
+import re
+import shutil
+import struct
+import sys
+import tempfile
+from array import array
+from collections import deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, partial
+from itertools import starmap
+from pathlib import Path
+from typing import Tuple
+
+from ubercode.utils import convert
 # todo: fix the typeing for cursor
+# numpy is optional; when installed typed numeric columns are returned as numpy arrays instead of array.array
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# number of rows pulled from the cursor per fetchmany() call by the iter_* functions
+DEFAULT_BATCH_SIZE = 1000
+# number of worker threads used by export() to serialize chunks while the main thread keeps fetching
+DEFAULT_EXPORT_WORKERS = 4
+# number of generated row classes kept (one per distinct column name tuple); least recently used are dropped
+ROW_CLASS_CACHE_SIZE = 256
+
+_INVALID_IDENTIFIER_CHARS = re.compile(r"\W+")
+
+# type names that can be used instead of a callable in a converters mapping or spec string (ex: "id:int,active:bool")
+# NOTE: date keeps NULLs as None instead of converting them to now
+CONVERTER_TYPES = {
+    'str': convert.to_str,
+    'int': convert.to_int,
+    'bool': convert.to_bool,
+    'is_true': convert.is_true,
+    'none': convert.to_none,
+    'date': partial(convert.to_date, none_to_now=False),
+}
+
+
+# -------- cursor helpers --------
+def _columns(cursor) -> Tuple[str, ...]:
+    """
+    Column names of the current result set
+    :param cursor: database results cursor
+    :return: tuple of column names
+    """
+    return tuple(col[0] for col in cursor.description)
+
+
+def sanitize_columns(columns) -> Tuple[str, ...]:
+    """
+    Deterministically convert column names into unique, valid python identifiers so they can be used as attribute
+    names.  Ex: "count(*)" -> "count", "1st" -> "c_1st", "class" -> "class_", ("id", "id") -> ("id", "id_1")
+    :param columns: iterable of column names
+    :return: tuple of identifiers (same length and order as columns)
+    """
+    names = []
+    seen = set()
+    for index, column in enumerate(columns):
+        name = _INVALID_IDENTIFIER_CHARS.sub("_", str(column)).strip("_")
+        if not name:
+            name = f"column_{index}"
+        elif name[0].isdigit():
+            name = "c_" + name
+        elif keyword.iskeyword(name):
+            name += "_"
+        # duplicate names get the column position appended until unique
+        unique = name
+        while unique in seen:
+            unique = f"{unique}_{index}"
+        seen.add(unique)
+        names.append(unique)
+    return tuple(names)
+
+
+@lru_cache(maxsize=ROW_CLASS_CACHE_SIZE)
+def tuple_class(columns: Tuple[str, ...]):
+    """
+    Named tuple class for a set of column names; generated once and shared by all callers with the same columns
+    NOTE: column names that are not valid identifiers are converted using sanitize_columns()
+    :param columns: tuple of column names (must be hashable)
+    :return: namedtuple class named Result
+    """
+    return namedtuple('Result', sanitize_columns(columns))
+
+
+class Record:
+    """
+    Base class for the lightweight __slots__ row records generated by record_class()
+    NOTE: records use roughly the memory of a tuple, support attribute access and can optionally be mutable
+    """
+    __slots__ = ()
+    _fields = ()
+
+    def _asdict(self) -> dict:
+        """
+        :return: dict containing field_name:value
+        """
+        return {name: getattr(self, name) for name in self._fields}
+
+    def __iter__(self):
+        return (getattr(self, name) for name in self._fields)
+
+    def __len__(self):
+        return len(self._fields)
+
+    def __eq__(self, other):
+        if type(other) is not type(self):
+            return NotImplemented
+        return tuple(self) == tuple(other)
+
+    def __repr__(self):
+        values = ", ".join(f"{name}={getattr(self, name)!r}" for name in self._fields)
+        return f"{type(self).__name__}({values})"
+
+
+class FrozenRecord(Record):
+    """ Base class for immutable (and hashable) generated records """
+    __slots__ = ()
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is immutable; use record_class(columns, mutable=True)")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{type(self).__name__} is immutable; use record_class(columns, mutable=True)")
+
+    def __hash__(self):
+        return hash(tuple(self))
+
+
+@lru_cache(maxsize=ROW_CLASS_CACHE_SIZE)
+def record_class(columns: Tuple[str, ...], mutable: bool = True):
+    """
+    __slots__ based record class for a set of column names; generated once and shared by all callers with the same
+    columns.  Instances are created positionally like a tuple: cls(*row)
+    NOTE: column names that are not valid identifiers are converted using sanitize_columns()
+    :param columns: tuple of column names (must be hashable)
+    :param mutable: allow fields to be assigned after creation (default); immutable records are hashable but slower
+        to create since every field is assigned through its slot descriptor
+    :return: Record subclass named Record
+    """
+    fields = sanitize_columns(columns)
+    cls = type('Record', (Record if mutable else FrozenRecord,), {'__slots__': fields, '_fields': fields})
+    # generate an __init__ with one positional parameter per field; sanitized names never start with _ so the
+    #   _self/_set names can't collide with a field.  Frozen records assign through the slot descriptors directly.
+    if mutable:
+        namespace = {}
+        body = [f"    _self.{name} = {name}" for name in fields]
+    else:
+        namespace = {f"_set{index}": getattr(cls, name).__set__ for index, name in enumerate(fields)}
+        body = [f"    _set{index}(_self, {name})" for index, name in enumerate(fields)]
+    source = f"def __init__(_self{''.join(', ' + name for name in fields)}):\n" + "\n".join(body or ["    pass"])
+    exec(source, namespace)
+    cls.__init__ = namespace['__init__']
+    return cls
+
+
+def _compile_converters(columns: Tuple[str, ...], converters) -> Tuple[tuple, ...]:
+    """
+    Precompile a converters mapping into (column index, callable) pairs so rows can be converted without any
+    per cell name lookups
+    :param columns: column names of the result set
+    :param converters: None, dict of column_name:callable or type name (see CONVERTER_TYPES) or a spec string
+        like "id:int, active:bool, created:date"
+    :return: tuple of (index, callable) pairs; empty if there is nothing to convert
+    """
+    if not converters:
+        return ()
+    if isinstance(converters, str):
+        converters = dict(
+            (part.strip() for part in item.rsplit(":", 1)) for item in converters.split(",") if item.strip()
+        )
+    positions = {column: index for index, column in enumerate(columns)}
+    compiled = []
+    for column, function in converters.items():
+        if column not in positions:
+            raise ValueError(f"Converter column [{column}] is not in the result columns {list(columns)}!")
+        if isinstance(function, str):
+            if function not in CONVERTER_TYPES:
+                raise ValueError(f"Converter type [{function}] must be one of {list(CONVERTER_TYPES)}!")
+            function = CONVERTER_TYPES[function]
+        compiled.append((positions[column], function))
+    return tuple(compiled)
+
+
+def _convert_rows(rows, converters: Tuple[tuple, ...]):
+    """
+    Apply precompiled converters to a batch of rows
+    :param rows: list of row sequences
+    :param converters: (index, callable) pairs from _compile_converters()
+    :return: the original rows if there is nothing to convert otherwise a list of converted row lists
+    """
+    if not converters:
+        return rows
+    converted = []
+    for row in rows:
+        row = list(row)
+        for index, function in converters:
+            row[index] = function(row[index])
+        converted.append(row)
+    return converted
+
+
+def _iter_batches(cursor, batch_size: int = DEFAULT_BATCH_SIZE):
+    """
+    Pull rows from a cursor in fetchmany() sized batches until it is exhausted
+    :param cursor: database results cursor
+    :param batch_size: number of rows to request per fetchmany() call
+    :return: generator of row lists
+    """
+    if batch_size < 1:
+        raise ValueError(f"batch_size must be a positive integer; got [{batch_size}]")
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            return
+        yield rows
 
 
 # -------- cursor conversions --------
-def to_values(cursor):
+# NOTE: every conversion takes an optional converters mapping (see _compile_converters) applied while the rows are
+#   built so there is no second pass over the results.  Ex: to_dicts(cursor, converters={'active': convert.to_bool})
+def to_values(cursor, converters=None):
     """
     Convert a single value set of results to a list of element values
     :param cursor: database results cursor
+    :param converters: optional column_name:callable mapping or spec string applied to each row
     :return: list of values
     """
+    converters = _compile_converters(_columns(cursor), converters)
     return [
-        row[0] for row in cursor.fetchall()
+        row[0] for row in _convert_rows(cursor.fetchall(), converters)
     ]
 
 
-def to_dicts(cursor):
+def to_dicts(cursor, converters=None):
     """
     Convert all rows from a cursor of results as a list of dicts
     :param cursor: database results cursor
+    :param converters: optional column_name:callable mapping or spec string applied to each row
     :return: list of dicts containing field_name:value
     """
-    columns = [col[0] for col in cursor.description]
+    columns = _columns(cursor)
+    converters = _compile_converters(columns, converters)
     return [
         dict(zip(columns, row))
-        for row in cursor.fetchall()
+        for row in _convert_rows(cursor.fetchall(), converters)
     ]
 
 
-def to_tuples(cursor):
+def to_tuples(cursor, converters=None):
     """
     Convert all rows from a cursor of results as a list of tuples
     :param cursor: database results cursor
+    :param converters: optional column_name:callable mapping or spec string applied to each row
+    :return: list of tuples containing field_name:value
+    """
+    columns = _columns(cursor)
+    nt_result = tuple_class(columns)
+    converters = _compile_converters(columns, converters)
+    return [nt_result(*row) for row in _convert_rows(cursor.fetchall(), converters)]
+
+
+def to_records(cursor, mutable: bool = True, converters=None):
+    """
+    Convert all rows from a cursor of results as a list of lightweight __slots__ records
+    :param cursor: database results cursor
+    :param mutable: allow record fields to be assigned after creation
+    :param converters: optional column_name:callable mapping or spec string applied to each row
+    :return: list of records with attribute access and _asdict()
+    """
+    columns = _columns(cursor)
+    record = record_class(columns, mutable)
+    converters = _compile_converters(columns, converters)
+    return list(starmap(record, _convert_rows(cursor.fetchall(), converters)))
+
+
+# -------- streaming cursor conversions --------
+# NOTE: these pull rows with fetchmany(batch_size) and yield them lazily so memory stays flat no matter how many
+#   rows come back; use them instead of the to_* functions for large result sets
+def iter_values(cursor, batch_size: int = DEFAULT_BATCH_SIZE, converters=None):
+    """
+    Lazily yield the first element of each row from a cursor of results
+    :param cursor: database results cursor
+    :param batch_size: number of rows to request per fetchmany() call
+    :param converters: optional column_name:callable mapping or spec string applied to each row
+    :return: generator of values
+    """
+    converters = _compile_converters(_columns(cursor), converters)
+    for rows in _iter_batches(cursor, batch_size):
+        for row in _convert_rows(rows, converters):
+            yield row[0]
+
+
+def iter_dicts(cursor, batch_size: int = DEFAULT_BATCH_SIZE, converters=None):
+    """
+    Lazily yield each row from a cursor of results as a dict
+    :param cursor: database results cursor
+    :param batch_size: number of rows to request per fetchmany() call
+    :param converters: optional column_name:callable mapping or spec string applied to each row
+    :return: generator of dicts containing field_name:value
+    """
+    columns = _columns(cursor)
+    converters = _compile_converters(columns, converters)
+    for rows in _iter_batches(cursor, batch_size):
+        for row in _convert_rows(rows, converters):
+            yield dict(zip(columns, row))
+
+
+def iter_tuples(cursor, batch_size: int = DEFAULT_BATCH_SIZE, converters=None):
+    """
+    Lazily yield each row from a cursor of results as a named tuple
+    :param cursor: database results cursor
+    :param batch_size: number of rows to request per fetchmany() call
+    :param converters: optional column_name:callable mapping or spec string applied to each row
+    :return: generator of tuples containing field_name:value
+    """
+    columns = _columns(cursor)
+    nt_result = tuple_class(columns)
+    converters = _compile_converters(columns, converters)
+    for rows in _iter_batches(cursor, batch_size):
+        for row in _convert_rows(rows, converters):
+            yield nt_result(*row)
+
+
+def iter_records(cursor, batch_size: int = DEFAULT_BATCH_SIZE, mutable: bool = True, converters=None):
+    """
+    Lazily yield each row from a cursor of results as a lightweight __slots__ record
+    :param cursor: database results cursor
+    :param batch_size: number of rows to request per fetchmany() call
+    :param mutable: allow record fields to be assigned after creation
+    :param converters: optional column_name:callable mapping or spec string applied to each row
+    :return: generator of records with attribute access and _asdict()
+    """
+    columns = _columns(cursor)
+    record = record_class(columns, mutable)
+    converters = _compile_converters(columns, converters)
+    for rows in _iter_batches(cursor, batch_size):
+        yield from starmap(record, _convert_rows(rows, converters))
+
+
+# -------- columnar cursor conversions --------
+def _column_typecode(values) -> str or None:
+    """
+    Pick a compact array.array typecode for a column from its first batch of values
+    :param values: column values
+    :return: 'q' for ints, 'd' for floats or None if the column should be a list
+    """
+    kinds = set(map(type, values))
+    if kinds == {int}:
+        return 'q'
+    if kinds and kinds <= {int, float}:
+        return 'd'
+    return None
+
+
+def _column_converters(columns: Tuple[str, ...], converters) -> list:
+    """
+    Precompile converters for the columnar conversions which apply them a whole column at a time with map()
+    :param columns: column names of the result set
+    :param converters: converters mapping or spec string (see _compile_converters)
+    :return: list with a callable or None for each column
+    """
+    compiled = [None] * len(columns)
+    for index, function in _compile_converters(columns, converters):
+        compiled[index] = function
+    return compiled
+
+
+class _ColumnBuilder:
+    """ Appends transposed fetchmany() batches to per column buffers (shared by to_columns and ato_columns) """
+    def __init__(self, columns: Tuple[str, ...], typed: bool = True, converters=None):
+        self.columns = columns
+        self.typed = typed
+        self.data = [None] * len(columns)
+        self.converters = _column_converters(columns, converters)
+
+    def add(self, rows) -> None:
+        data = self.data
+        converters = self.converters
+        for index, values in enumerate(zip(*rows)):
+            if converters[index] is not None:
+                values = list(map(converters[index], values))
+            column = data[index]
+            if column is None:
+                typecode = _column_typecode(values) if self.typed else None
+                column = data[index] = array(typecode) if typecode else []
+            if type(column) is list:
+                column.extend(values)
+                continue
+            size = len(column)
+            try:
+                column.extend(values)
+            except (TypeError, OverflowError):
+                # value doesn't fit the array; drop anything partially appended and demote the column to a list
+                del column[size:]
+                column = data[index] = column.tolist()
+                column.extend(values)
+
+    def result(self) -> dict:
+        result = {}
+        for name, column in zip(self.columns, self.data):
+            if column is None:
+                column = []
+            elif numpy is not None and type(column) is array:
+                column = numpy.frombuffer(column, dtype=column.typecode)
+            result[name] = column
+        return result
+
+
+def to_columns(cursor, typed: bool = True, batch_size: int = DEFAULT_BATCH_SIZE, converters=None) -> dict:
+    """
+    Convert all rows from a cursor of results to a dict of columns in a single pass over fetchmany() batches
+    NOTE: no per row dicts are created; each batch is transposed and appended to its columns
+    :param cursor: database results cursor
+    :param typed: store int/float columns in compact array.array buffers (numpy arrays if numpy is installed);
+        a column falls back to a list if it contains None or any non-numeric value
+    :param batch_size: number of rows to request per fetchmany() call
+    :param converters: optional column_name:callable mapping or spec string applied to each column
+    :return: dict of field_name:sequence of values
+    """
+    builder = _ColumnBuilder(_columns(cursor), typed, converters)
+    for rows in _iter_batches(cursor, batch_size):
+        builder.add(rows)
+    return builder.result()
+
+
+# -------- async cursor conversions --------
+# NOTE: for drivers whose cursor fetch methods are awaitable (aiosqlite style); cursor.description is still expected
+#   to be a plain attribute.  Rows are pulled in fetchmany(batch_size) batches so the event loop gets control back
+#   between batches, and the same row class caches and converters as the sync functions are used.
+async def _aiter_batches(cursor, batch_size: int = DEFAULT_BATCH_SIZE):
+    """
+    Pull rows from an async cursor in fetchmany() sized batches until it is exhausted
+    :param cursor: async database results cursor
+    :param batch_size: number of rows to request per fetchmany() call
+    :return: async generator of row lists
+    """
+    if batch_size < 1:
+        raise ValueError(f"batch_size must be a positive integer; got [{batch_size}]")
+    while True:
+        rows = await cursor.fetchmany(batch_size)
+        if not rows:
+            return
+        yield rows
+
+
+async def ato_values(cursor, converters=None):
+    """
+    Async version of to_values()
+    :param cursor: async database results cursor
+    :param converters: optional column_name:callable mapping or spec string applied to each row
+    :return: list of values
+    """
+    converters = _compile_converters(_columns(cursor), converters)
+    return [
+        row[0] for row in _convert_rows(await cursor.fetchall(), converters)
+    ]
+
+
+async def ato_dicts(cursor, converters=None):
+    """
+    Async version of to_dicts()
+    :param cursor: async database results cursor
+    :param converters: optional column_name:callable mapping or spec string applied to each row
+    :return: list of dicts containing field_name:value
+    """
+    columns = _columns(cursor)
+    converters = _compile_converters(columns, converters)
+    return [
+        dict(zip(columns, row))
+        for row in _convert_rows(await cursor.fetchall(), converters)
+    ]
+
+
+async def ato_tuples(cursor, converters=None):
+    """
+    Async version of to_tuples()
+    :param cursor: async database results cursor
+    :param converters: optional column_name:callable mapping or spec string applied to each row
     :return: list of tuples containing field_name:value
     """
-    desc = cursor.description
-    nt_result = namedtuple('Result', [col[0] for col in desc])
-    return [nt_result(*row) for row in cursor.fetchall()]
+    columns = _columns(cursor)
+    nt_result = tuple_class(columns)
+    converters = _compile_converters(columns, converters)
+    return [nt_result(*row) for row in _convert_rows(await cursor.fetchall(), converters)]
+
+
+async def ato_records(cursor, mutable: bool = True, converters=None):
+    """
+    Async version of to_records()
+    :param cursor: async database results cursor
+    :param mutable: allow record fields to be assigned after creation
+    :param converters: optional column_name:callable mapping or spec string applied to each row
+    :return: list of records with attribute access and _asdict()
+    """
+    columns = _columns(cursor)
+    record = record_class(columns, mutable)
+    converters = _compile_converters(columns, converters)
+    return list(starmap(record, _convert_rows(await cursor.fetchall(), converters)))
+
+
+async def ato_columns(cursor, typed: bool = True, batch_size: int = DEFAULT_BATCH_SIZE, converters=None) -> dict:
+    """
+    Async version of to_columns()
+    :param cursor: async database results cursor
+    :param typed: store int/float columns in compact buffers (see to_columns)
+    :param batch_size: number of rows to request per fetchmany() call
+    :param converters: optional column_name:callable mapping or spec string applied to each column
+    :return: dict of field_name:sequence of values
+    """
+    builder = _ColumnBuilder(_columns(cursor), typed, converters)
+    async for rows in _aiter_batches(cursor, batch_size):
+        builder.add(rows)
+    return builder.result()
+
+
+async def aiter_values(cursor, batch_size: int = DEFAULT_BATCH_SIZE, converters=None):
+    """
+    Async version of iter_values()
+    :param cursor: async database results cursor
+    :param batch_size: number of rows to request per fetchmany() call
+    :param converters: optional column_name:callable mapping or spec string applied to each row
+    :return: async generator of values
+    """
+    converters = _compile_converters(_columns(cursor), converters)
+    async for rows in _aiter_batches(cursor, batch_size):
+        for row in _convert_rows(rows, converters):
+            yield row[0]
+
+
+async def aiter_dicts(cursor, batch_size: int = DEFAULT_BATCH_SIZE, converters=None):
+    """
+    Async version of iter_dicts()
+    :param cursor: async database results cursor
+    :param batch_size: number of rows to request per fetchmany() call
+    :param converters: optional column_name:callable mapping or spec string applied to each row
+    :return: async generator of dicts containing field_name:value
+    """
+    columns = _columns(cursor)
+    converters = _compile_converters(columns, converters)
+    async for rows in _aiter_batches(cursor, batch_size):
+        for row in _convert_rows(rows, converters):
+            yield dict(zip(columns, row))
+
+
+async def aiter_tuples(cursor, batch_size: int = DEFAULT_BATCH_SIZE, converters=None):
+    """
+    Async version of iter_tuples()
+    :param cursor: async database results cursor
+    :param batch_size: number of rows to request per fetchmany() call
+    :param converters: optional column_name:callable mapping or spec string applied to each row
+    :return: async generator of tuples containing field_name:value
+    """
+    columns = _columns(cursor)
+    nt_result = tuple_class(columns)
+    converters = _compile_converters(columns, converters)
+    async for rows in _aiter_batches(cursor, batch_size):
+        for row in _convert_rows(rows, converters):
+            yield nt_result(*row)
+
+
+async def aiter_records(cursor, batch_size: int = DEFAULT_BATCH_SIZE, mutable: bool = True, converters=None):
+    """
+    Async version of iter_records()
+    :param cursor: async database results cursor
+    :param batch_size: number of rows to request per fetchmany() call
+    :param mutable: allow record fields to be assigned after creation
+    :param converters: optional column_name:callable mapping or spec string applied to each row
+    :return: async generator of records with attribute access and _asdict()
+    """
+    columns = _columns(cursor)
+    record = record_class(columns, mutable)
+    converters = _compile_converters(columns, converters)
+    async for rows in _aiter_batches(cursor, batch_size):
+        for row in starmap(record, _convert_rows(rows, converters)):
+            yield row
+
+
+# -------- file exports --------
+def _encode_jsonl(columns: Tuple[str, ...], rows) -> str:
+    """ encode a chunk of rows as json lines (one object per row); values json can't encode are written as str """
+    dumps = json.dumps
+    return "".join([dumps(dict(zip(columns, row)), default=str) + "\n" for row in rows])
+
+
+def _encode_csv(columns: Tuple[str, ...], rows) -> str:
+    """ encode a chunk of rows as csv lines using the default csv dialect """
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    return buffer.getvalue()
+
+
+EXPORT_FORMATS = {
+    'jsonl': _encode_jsonl,
+    'csv': _encode_csv,
+}
+
+
+def _encode_chunk(encoder, columns: Tuple[str, ...], rows, converters: Tuple[tuple, ...]) -> str:
+    return encoder(columns, _convert_rows(rows, converters))
+
+
+def export(cursor, path, format: str = 'jsonl', chunk_rows: int = DEFAULT_BATCH_SIZE,
+           workers: int = DEFAULT_EXPORT_WORKERS, converters=None) -> int:
+    """
+    Stream all rows from a cursor of results to a json lines or csv file (utf-8) in chunk_rows sized fetchmany()
+    batches.  Chunks are converted and serialized on a pool of worker threads while the main thread keeps fetching
+    so database I/O and encoding overlap; chunks are always written in order so the file is byte-identical to a
+    serial export (workers=1).  At most 2 * workers chunks are held in memory at a time.
+    :param cursor: database results cursor
+    :param path: output file path
+    :param format: 'jsonl' (one json object per row) or 'csv' (header row of column names then one line per row)
+    :param chunk_rows: number of rows per fetchmany() call and per serialized chunk
+    :param workers: number of serializing threads; 1 or less serializes on the calling thread
+    :param converters: optional column_name:callable mapping or spec string applied to each row
+    :return: number of rows written
+    """
+    if format not in EXPORT_FORMATS:
+        raise ValueError(f"Export format [{format}] must be one of {list(EXPORT_FORMATS)}!")
+    encoder = EXPORT_FORMATS[format]
+    columns = _columns(cursor)
+    converters = _compile_converters(columns, converters)
+    count = 0
+    with open(path, 'w', encoding='utf-8', newline='') as output:
+        if format == 'csv':
+            output.write(_encode_csv(columns, [columns]))
+        if workers <= 1:
+            for rows in _iter_batches(cursor, chunk_rows):
+                output.write(_encode_chunk(encoder, columns, rows, converters))
+                count += len(rows)
+            return count
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            pending = deque()
+            for rows in _iter_batches(cursor, chunk_rows):
+                pending.append(pool.submit(_encode_chunk, encoder, columns, rows, converters))
+                count += len(rows)
+                # write finished chunks in order; block on the oldest one if too many are in flight
+                while pending and (pending[0].done() or len(pending) >= workers * 2):
+                    output.write(pending.popleft().result())
+            while pending:
+                output.write(pending.popleft().result())
+    return count
+
+
+# -------- columnar spill files --------
+# NOTE: a small dependency free binary columnar format for result sets that don't fit in memory:
+#   magic (8 bytes) | header length (u32) | header (utf-8 json: version, byteorder, rows, columns[name, type])
+#   then one block per column, in header order, each 8 byte aligned: data length (u64) | data | zero padding
+#   int columns ('q') and float columns ('d') are raw native-endian 8 byte values so a reader can hand out zero-copy
+#   memoryviews; every other column ('object') is newline separated json values (json can't encode -> str).
+SPILL_MAGIC = b"UBRSPL1\n"
+_SPILL_HEADER = struct.Struct("<I")
+_SPILL_LENGTH = struct.Struct("<Q")
+
+
+def _padding(size: int) -> bytes:
+    return b"\0" * (-size % 8)
+
+
+class _SpillColumn:
+    """ one column of a spill file being written; values are appended to a temporary file batch by batch """
+    def __init__(self, folder: str):
+        self.folder = folder
+        self.type = None
+        self.file = tempfile.TemporaryFile(dir=folder)
+
+    def add(self, values) -> None:
+        if self.type is None:
+            self.type = _column_typecode(values) or 'object'
+        if self.type != 'object':
+            try:
+                array(self.type, values).tofile(self.file)
+                return
+            except (TypeError, OverflowError):
+                self._demote()
+        self.file.write("".join([json.dumps(value, default=str) + "\n" for value in values]).encode('utf-8'))
+
+    def _demote(self) -> None:
+        """ rewrite the numbers spilled so far as json values when a value doesn't fit the numeric column """
+        numbers, self.file = self.file, tempfile.TemporaryFile(dir=self.folder)
+        numbers.seek(0)
+        while True:
+            chunk = array(self.type, numbers.read(DEFAULT_BATCH_SIZE * 8))
+            if not chunk:
+                break
+            self.file.write("".join([json.dumps(value) + "\n" for value in chunk]).encode('utf-8'))
+        numbers.close()
+        self.type = 'object'
+
+
+def spill(cursor, path, batch_size: int = DEFAULT_BATCH_SIZE, converters=None) -> int:
+    """
+    Stream all rows from a cursor of results into a columnar spill file (see SpillFile to read it back)
+    NOTE: each column is spilled to a temporary file next to path while fetching so only one batch is held in memory;
+        the column types are picked from the first batch like to_columns(typed=True)
+    :param cursor: database results cursor
+    :param path: output file path
+    :param batch_size: number of rows to request per fetchmany() call
+    :param converters: optional column_name:callable mapping or spec string applied to each column
+    :return: number of rows written
+    """
+    columns = _columns(cursor)
+    folder = str(Path(path).resolve().parent)
+    converters = _column_converters(columns, converters)
+    data = [_SpillColumn(folder) for _ in columns]
+    rows_written = 0
+    try:
+        for rows in _iter_batches(cursor, batch_size):
+            rows_written += len(rows)
+            for column, converter, values in zip(data, converters, zip(*rows)):
+                column.add(values if converter is None else list(map(converter, values)))
+        header = json.dumps({
+            'version': 1,
+            'byteorder': sys.byteorder,
+            'rows': rows_written,
+            'columns': [{'name': name, 'type': column.type or 'object'} for name, column in zip(columns, data)],
+        }).encode('utf-8')
+        with open(path, 'wb') as output:
+            output.write(SPILL_MAGIC + _SPILL_HEADER.pack(len(header)) + header)
+            output.write(_padding(len(SPILL_MAGIC) + _SPILL_HEADER.size + len(header)))
+            for column in data:
+                size = column.file.tell()
+                column.file.seek(0)
+                output.write(_SPILL_LENGTH.pack(size))
+                shutil.copyfileobj(column.file, output)
+                output.write(_padding(size))
+    finally:
+        for column in data:
+            column.file.close()
+    return rows_written
+
+
+class SpillFile:
+    """
+    Reader for files written by spill(); the file is memory mapped so int and float columns are returned as zero-copy
+    memoryviews (cast to 'q' or 'd') and only the object columns that are asked for get decoded.
+    NOTE: release any memoryviews handed out before calling close() (or leaving the with block)
+    """
+    def __init__(self, path):
+        with open(path, 'rb') as spill_file:
+            self._mmap = mmap.mmap(spill_file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mmap)
+        if self._view[:len(SPILL_MAGIC)] != SPILL_MAGIC:
+            self.close()
+            raise ValueError(f"[{path}] is not a spill file!")
+        position = len(SPILL_MAGIC)
+        header_size = _SPILL_HEADER.unpack_from(self._view, position)[0]
+        position += _SPILL_HEADER.size
+        header = json.loads(bytes(self._view[position:position + header_size]))
+        if header['byteorder'] != sys.byteorder:
+            self.close()
+            raise ValueError(f"[{path}] was written on a {header['byteorder']} endian machine!")
+        position += header_size
+        position += -position % 8
+        self.rows = header['rows']
+        self.types = {}
+        self._blocks = {}
+        for column in header['columns']:
+            size = _SPILL_LENGTH.unpack_from(self._view, position)[0]
+            position += _SPILL_LENGTH.size
+            self.types[column['name']] = column['type']
+            self._blocks[column['name']] = (position, position + size)
+            position += size + (-size % 8)
+
+    @property
+    def columns(self) -> list:
+        return list(self.types)
+
+    def column(self, name: str):
+        """
+        Values for a single column
+        :param name: column name
+        :return: memoryview of 'q'/'d' values for numeric columns otherwise a list of decoded values
+        """
+        start, end = self._blocks[name]
+        block = self._view[start:end]
+        column_type = self.types[name]
+        if column_type != 'object':
+            return block.cast(column_type)
+        with block:
+            return [json.loads(line) for line in bytes(block).splitlines()]
+
+    def __getitem__(self, name: str):
+        return self.column(name)
+
+    def to_columns(self) -> dict:
+        """
+        :return: dict of field_name:values for every column (see column())
+        """
+        return {name: self.column(name) for name in self.types}
+
+    def close(self) -> None:
+        self._view.release()
+        self._mmap.close()
+
+    def __enter__(self):
+        return self
 
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
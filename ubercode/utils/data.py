@@ -1,22 +1,609 @@
 """
 A collection of basic json/xml conversion helper utilities.
 """
+import codecs
+import copy
+import hashlib
+import importlib
+import io
 import json
+import mmap
+import os
 import re
+import threading
 # from typing import Self (Not available until 3.9; omitting for now)
 import xml.etree.ElementTree as Etree
+from collections import OrderedDict, deque, namedtuple
+from collections.abc import Mapping
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
 # from typing import Self (Not available until 3.9; omitting for now)
-from collections import defaultdict
+
+from ubercode.utils import cursor, query
+
+# bare ampersands; the named xml/html entities and numeric character references are left alone
+_AMPERSAND = re.compile(r"&(?!(?:amp|lt|gt|quot|apos|#[0-9]+|#[xX][0-9a-fA-F]+);)")
+_AMPERSAND_BYTES = re.compile(_AMPERSAND.pattern.encode('ascii'))
+# an & at the end of a chunk that could still become an entity once more input arrives (&am, &#00000, &#x2, ...);
+#   the streaming filters hold it back so the ampersand regex always sees an entity whole however long it is
+_PARTIAL_ENTITY = re.compile(r"&(?:a(?:m(?:p)?|p(?:o(?:s)?)?)?|l(?:t)?|g(?:t)?|q(?:u(?:o(?:t)?)?)?"
+                             r"|#(?:[0-9]*|[xX][0-9a-fA-F]*))?\Z")
+_PARTIAL_ENTITY_BYTES = re.compile(_PARTIAL_ENTITY.pattern.encode('ascii'))
+# number of chars read from a file at a time by the streaming readers
+DEFAULT_READ_SIZE = 64 * 1024
+# number of encoded chars collected before each write by the streaming writers
+DEFAULT_WRITE_SIZE = 64 * 1024
+# files of at least this many bytes are memory mapped by from_json_file/from_xml_file instead of read into memory
+MMAP_THRESHOLD = 1024 * 1024
+# number of bytes of a memory mapped file escaped (and fed to the xml parser) at a time
+MMAP_CHUNK_SIZE = 1024 * 1024
+
+_JSON_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_JSON_STRUCTURE = re.compile(r'["\[\]{}]')
+_JSON_STRING_END = re.compile(r'["\\]')
+# a decode error or a value end this close to the end of the read buffer may just be a value cut off by the read
+#   (the longest partial token is -Infinity or a \uXXXX escape)
+_JSON_TRUNCATION_WINDOW = 16
+# madvise() lets a read only mapping drop pages that have already been parsed (linux/mac; None elsewhere)
+_MADV_DONTNEED = getattr(mmap, 'MADV_DONTNEED', None) if hasattr(mmap.mmap, 'madvise') else None
+
+
+# -------- json codecs --------
+# preferred order used when the backend is 'auto'; 'json' (the standard library) is always available
+JSON_BACKENDS = ('orjson', 'simdjson', 'ujson', 'json')
+# errors a fast backend raises for input the standard library may still accept (NaN, huge ints, non-str keys, ...)
+_CODEC_ERRORS = (ValueError, TypeError, OverflowError)
+
+
+def _stdlib_dumps(value) -> str:
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':'))
+
+
+class JSONCodec:
+    """
+    A loads/dumps pair for one json library.  Fast backends are tried first and anything they reject is handed to
+    the standard library so results (and errors) are the same whichever backend is active; the built in backends
+    only decode (see _orjson_codec) so dumps is the standard library unless a codec passes its own.
+    dumps() always returns compact json text (no spaces after separators, non-ascii chars unescaped).
+    """
+    def __init__(self, name: str, loads=json.loads, dumps=_stdlib_dumps, buffers: bool = False):
+        self.name = name
+        self._loads = loads
+        self._dumps = dumps
+        # loads() accepts any bytes-like buffer (memoryview, mmap) so a file can be parsed without copying it
+        self.buffers = buffers
+
+    def loads(self, value: str or bytes):
+        """
+        :param value: json text as str, bytes or bytearray
+        :return: decoded python value
+        """
+        if self._loads is json.loads:
+            return json.loads(value)
+        try:
+            return self._loads(value)
+        except _CODEC_ERRORS:
+            return json.loads(value)
+
+    def dumps(self, value) -> str:
+        """
+        :param value: python value to encode
+        :return: compact json text
+        """
+        if self._dumps is _stdlib_dumps:
+            return _stdlib_dumps(value)
+        try:
+            return self._dumps(value)
+        except _CODEC_ERRORS:
+            return _stdlib_dumps(value)
+
+    def __repr__(self):
+        return f"JSONCodec({self.name!r})"
+
+
+# NOTE: the backends only decode; orjson and ujson encode values the standard library rejects (datetime, UUID, enum,
+#   dataclass, Decimal) and orjson writes NaN as null without raising so nothing could fall back and the text would
+#   silently differ; encoding always uses the standard library
+def _orjson_codec(module) -> JSONCodec:
+    return JSONCodec('orjson', module.loads, buffers=True)
+
+
+def _simdjson_codec(module) -> JSONCodec:
+    return JSONCodec('simdjson', module.loads)
+
+
+def _ujson_codec(module) -> JSONCodec:
+    return JSONCodec('ujson', module.loads)
+
+
+_CODEC_FACTORIES = {
+    'orjson': _orjson_codec,
+    'simdjson': _simdjson_codec,
+    'ujson': _ujson_codec,
+}
+_codecs = {'json': JSONCodec('json')}
+_json_backend = 'auto'
+
+
+def _codec(name: str) -> JSONCodec or None:
+    """ the codec for one backend (imported on first use) or None when its library isn't installed """
+    if name not in _codecs:
+        if name not in _CODEC_FACTORIES:
+            raise ValueError(f"Unknown json backend [{name}]; expected auto or one of {', '.join(JSON_BACKENDS)}!")
+        try:
+            module = importlib.import_module(name)
+        except ImportError:
+            module = None
+        _codecs[name] = _CODEC_FACTORIES[name](module) if module is not None else None
+    return _codecs[name]
+
+
+def available_json_backends() -> list:
+    """
+    :return: names of the json backends that are installed in preferred order (always ends with 'json')
+    """
+    return [name for name in JSON_BACKENDS if _codec(name) is not None]
+
+
+def get_json_codec(backend: str or None = None) -> JSONCodec:
+    """
+    :param backend: 'auto', a backend name from JSON_BACKENDS or None for the global setting (see set_json_backend)
+    :return: JSONCodec for the backend; 'auto' picks the first installed backend
+    """
+    backend = backend or _json_backend
+    if backend == 'auto':
+        return _codec(available_json_backends()[0])
+    codec = _codec(backend)
+    if codec is None:
+        raise ValueError(f"json backend [{backend}] is not installed!")
+    return codec
+
+
+def set_json_backend(backend: str = 'auto') -> str:
+    """
+    Select the json backend used by JSON instances that don't pick their own
+    :param backend: 'auto' (fastest installed) or a backend name from JSON_BACKENDS
+    :return: name of the now active backend
+    """
+    global _json_backend
+    name = get_json_codec(backend).name
+    _json_backend = backend
+    return name
+
+
+def get_json_backend() -> str:
+    """
+    :return: name of the json backend currently used by default
+    """
+    return get_json_codec().name
+
+
+def escape_ampersands(value: str or bytes) -> str or bytes:
+    """
+    Encode bare ampersands as &amp; in a single pass without double encoding existing entities
+    (&amp; &lt; &gt; &quot; &apos; &#123; &#x7b;).  Input without any & is returned as is without scanning it twice.
+    :param value: str or bytes (bytes are matched directly so they never need to be decoded)
+    :return: value of the same type with bare ampersands encoded
+    """
+    if isinstance(value, str):
+        if "&" not in value:
+            return value
+        return _AMPERSAND.sub("&amp;", value)
+    if b"&" not in value:
+        return value
+    return _AMPERSAND_BYTES.sub(b"&amp;", value)
+
+
+def _partial_entity(value: str or bytes or mmap.mmap, start: int = 0, end: int or None = None) -> int or None:
+    """
+    :param value: str, bytes or a bytes-like buffer (ex: mmap)
+    :param start: offset of the chunk in value
+    :param end: offset of the end of the chunk (None for the end of value)
+    :return: offset of a trailing & that could still start an entity (see _PARTIAL_ENTITY) or None
+    """
+    end = len(value) if end is None else end
+    if isinstance(value, str):
+        ampersand, pattern = value.rfind("&", start, end), _PARTIAL_ENTITY
+    else:
+        ampersand, pattern = value.rfind(b"&", start, end), _PARTIAL_ENTITY_BYTES
+    if ampersand != -1 and pattern.match(value, ampersand, end):
+        return ampersand
+    return None
+
+
+class _AmpersandEncodingReader:
+    """
+    File-like wrapper around a text or binary file that encodes bare ampersands as it is read so large files can be
+    streamed into a parser (binary files keep their BOM and declared encoding for the parser).  A chunk ending in
+    what could still become an entity is held back until the next read so entities split across chunk boundaries
+    are never double encoded.
+    """
+    def __init__(self, source):
+        self.source = source
+        self.pending = None
+
+    def read(self, size: int = -1) -> str or bytes:
+        while True:
+            chunk = self.source.read(size)
+            text = self.pending + chunk if self.pending else chunk
+            self.pending = None
+            if not chunk or size is None or size < 0:
+                # end of file; nothing left to wait for
+                return escape_ampersands(text)
+            split = _partial_entity(text)
+            if split is None:
+                return escape_ampersands(text)
+            self.pending = text[split:]
+            if split:
+                return escape_ampersands(text[:split])
+
+
+class _MappedFile:
+    """
+    Read only memory map of an open binary file.  Pages that have been consumed can be dropped from the resident set
+    with release() (the OS page cache keeps them) so a file parsed front to back is never resident all at once.
+    """
+    def __init__(self, file):
+        self.buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.released = 0
+
+    def release(self, end: int or None = None) -> None:
+        """
+        :param end: offset everything before which has been consumed; None for the whole file
+        """
+        end = len(self.buffer) if end is None else end
+        end -= end % mmap.PAGESIZE
+        if end > self.released and _MADV_DONTNEED is not None:
+            self.buffer.madvise(_MADV_DONTNEED, self.released, end - self.released)
+            self.released = end
+
+    def escaped_chunks(self, start: int = 0, size: int = MMAP_CHUNK_SIZE):
+        """
+        Encode bare ampersands chunk by chunk straight from the mapping; a chunk never ends in what could still become
+        an entity (see _PARTIAL_ENTITY) so entities are always matched whole
+        :param start: offset of the first byte
+        :param size: number of bytes per chunk (a chunk grows past it while it is all one partial entity)
+        :return: generator of escaped bytes chunks
+        """
+        size = max(size, 1)
+        length = len(self.buffer)
+        while start < length:
+            end = min(start + size, length)
+            while end < length:
+                ampersand = _partial_entity(self.buffer, start, end)
+                if ampersand is None:
+                    break
+                if ampersand > start:
+                    end = ampersand
+                    break
+                end = min(end + size, length)
+            yield escape_ampersands(self.buffer[start:end])
+            self.release(end)
+            start = end
+
+    def close(self) -> None:
+        self.buffer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def _open_for_write(path_or_fp, binary: bool = False):
+    """
+    :param path_or_fp: file path or an already open file object
+    :param binary: open a path in binary mode instead of utf-8 text
+    :return: (file object, True if we opened it and need to close it)
+    """
+    if hasattr(path_or_fp, 'write'):
+        return path_or_fp, False
+    if binary:
+        return open(path_or_fp, 'wb'), True
+    return open(path_or_fp, 'w', encoding='utf-8'), True
+
+
+class _JSONArrayReader:
+    """
+    Incremental reader over a json text stream that walks down to one array and decodes its items one at a time
+    from a fixed size read buffer.  Values that are skipped on the way are scanned without being decoded.
+    """
+    def __init__(self, source, read_size: int = DEFAULT_READ_SIZE):
+        self.source = source
+        self.read_size = read_size
+        self.decoder = json.JSONDecoder()
+        self.buffer = ""
+        self.position = 0
+        self.eof = False
+
+    def _fill(self) -> bool:
+        """
+        read more text onto the end of the buffer dropping what has already been consumed
+        NOTE: reads at least as much as is left in the buffer so a value spanning many reads is re-decoded a
+            logarithmic number of times instead of once per read
+        :return: False at the end of the stream
+        """
+        if self.eof:
+            return False
+        remaining = self.buffer[self.position:]
+        chunk = self.source.read(max(self.read_size, len(remaining)))
+        if not chunk:
+            self.eof = True
+            return False
+        self.buffer = remaining + chunk
+        self.position = 0
+        return True
+
+    def _peek(self) -> str:
+        """ skip whitespace and return the next char without consuming it ('' at the end of the stream) """
+        while True:
+            self.position = _JSON_WHITESPACE.match(self.buffer, self.position).end()
+            if self.position < len(self.buffer):
+                return self.buffer[self.position]
+            if not self._fill():
+                return ""
+
+    def _expect(self, chars: str) -> str:
+        char = self._peek()
+        if not char or char not in chars:
+            raise ValueError(f"Expected one of [{chars}] but found [{char or 'end of file'}] in json stream!")
+        self.position += 1
+        return char
+
+    def _decode(self):
+        """ decode the next json value """
+        self._peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.position)
+            except json.JSONDecodeError as e:
+                # only a value cut off by the end of the buffer can be completed by reading more; a malformed value
+                #   anywhere else is raised right away instead of reading the rest of the stream into the buffer
+                if (e.pos >= len(self.buffer) - _JSON_TRUNCATION_WINDOW or e.msg.startswith("Unterminated string")) \
+                        and self._fill():
+                    continue
+                raise
+            # a number ending close to the end of the buffer could continue in the next read (ex: 1.5e|10)
+            if end >= len(self.buffer) - _JSON_TRUNCATION_WINDOW and self._fill():
+                continue
+            self.position = end
+            return value
+
+    def _skip(self) -> None:
+        """ move past the next json value without decoding it """
+        if self._peek() not in "[{":
+            self._decode()
+            return
+        depth = 0
+        in_string = False
+        while True:
+            if in_string:
+                match = _JSON_STRING_END.search(self.buffer, self.position)
+                if match and match.group() == '"':
+                    in_string = False
+                    self.position = match.end()
+                    continue
+                if match and match.end() < len(self.buffer):
+                    # skip the escaped char
+                    self.position = match.end() + 1
+                    continue
+                self.position = match.start() if match else len(self.buffer)
+            else:
+                match = _JSON_STRUCTURE.search(self.buffer, self.position)
+                if match:
+                    self.position = match.end()
+                    char = match.group()
+                    if char == '"':
+                        in_string = True
+                    elif char in "[{":
+                        depth += 1
+                    else:
+                        depth -= 1
+                        if depth == 0:
+                            return
+                    continue
+                self.position = len(self.buffer)
+            if not self._fill():
+                raise ValueError("Unexpected end of file in json stream!")
+
+    def iter_array(self, keys):
+        """
+        :param keys: object keys leading from the top level value to the array (empty for a top level array)
+        :return: generator of the array items
+        """
+        for key in keys:
+            self._expect("{")
+            if self._peek() == "}":
+                raise ValueError(f"Key [{key}] not found in json stream!")
+            while True:
+                name = self._decode()
+                self._expect(":")
+                if name == key:
+                    break
+                self._skip()
+                if self._expect(",}") == "}":
+                    raise ValueError(f"Key [{key}] not found in json stream!")
+        self._expect("[")
+        if self._peek() == "]":
+            return
+        while True:
+            yield self._decode()
+            if self._expect(",]") == "]":
+                return
+
+
+# -------- parse cache --------
+# total source bytes kept by a ParseCache by default
+DEFAULT_PARSE_CACHE_BYTES = 64 * 1024 * 1024
+_MISSING = object()
+
+
+class FrozenDict(dict):
+    """
+    Read-only dict used for cached json objects (see ParseCache) so callers can't corrupt a shared entry.  It is still
+    a dict for isinstance checks and json encoders; use dict(value) for a mutable (shallow) copy.
+    """
+    __slots__ = ()
+
+    def _immutable(self, *args, **kwargs):
+        raise TypeError(f"{type(self).__name__} is immutable; use dict(value) for a mutable copy")
+
+    __setitem__ = __delitem__ = __ior__ = clear = pop = popitem = setdefault = update = _immutable
+
+    def __reduce__(self):
+        return type(self), (dict(self),)
+
+
+def freeze(value):
+    """
+    :param value: json data (dicts, lists and scalars)
+    :return: the same data with dicts as FrozenDicts and lists as tuples
+    """
+    if isinstance(value, dict):
+        return FrozenDict((key, freeze(item)) for key, item in value.items())
+    if isinstance(value, list):
+        return tuple(map(freeze, value))
+    return value
+
+
+class ParseCache:
+    """
+    Opt-in, thread safe LRU cache of parse results shared by JSON/XML instances created with cache=...
+    Entries are keyed on a blake2b hash of the source (plus the kind, the str/bytes source type and the
+    encode_ampersands flag) and evicted least recently used first once the source bytes of all entries exceed max_bytes.
+    File loads also remember each file's mtime and size so an unchanged file isn't read or hashed again.
+    NOTE: JSON gets the cached value itself frozen (see freeze) so a cached entry can never be modified by a caller;
+        XML shares the cached tree copy on write (the XML methods read it directly, XML.data is a private copy made on
+        first access; copying costs as much as parsing so only callers that need the tree pay for it).  Files loaded
+        through a cache are read whole (never memory mapped) since their bytes are hashed anyway
+    """
+    def __init__(self, max_bytes: int = DEFAULT_PARSE_CACHE_BYTES):
+        """
+        :param max_bytes: total source bytes of the cached entries; larger sources are parsed but never cached
+        """
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        # key -> (parsed value, source bytes) in least to most recently used order
+        self._entries = OrderedDict()
+        # (kind, encode_ampersands, path) -> (mtime_ns, size, key) of the cached files and key -> their file keys
+        self._files = {}
+        self._key_files = {}
+        self._lock = threading.Lock()
+
+    def _get(self, key, count: bool = True):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            if count:
+                self.misses += 1
+            return _MISSING
+
+    def _put(self, key, value, size: int) -> None:
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                return
+            self._entries[key] = (value, size)
+            self.size += size
+            while self.size > self.max_bytes:
+                evicted, (_, evicted_size) = self._entries.popitem(last=False)
+                self.size -= evicted_size
+                # forget the files whose stat record points at the evicted entry
+                for file_key in self._key_files.pop(evicted, ()):
+                    known = self._files.get(file_key)
+                    if known is not None and known[2] == evicted:
+                        del self._files[file_key]
+
+    def parse(self, kind: str, source: str or bytes, encode_ampersands: bool, parse):
+        """
+        :param kind: 'json' or 'xml'
+        :param source: str or bytes being parsed (hashed as utf-8 when a str)
+        :param encode_ampersands: flag the source is parsed with
+        :param parse: callable() returning the value to cache on a miss
+        :return: the cached value
+        """
+        content = source.encode('utf-8', 'surrogatepass') if isinstance(source, str) else source
+        key = (kind, isinstance(source, str), encode_ampersands, hashlib.blake2b(content, digest_size=16).digest())
+        value = self._get(key)
+        if value is _MISSING:
+            value = parse()
+            self._put(key, value, len(content))
+        return value
+
+    def parse_file(self, kind: str, path: str, encode_ampersands: bool, parse):
+        """
+        :param kind: 'json' or 'xml'
+        :param path: file path
+        :param encode_ampersands: flag the file is parsed with
+        :param parse: callable(file bytes) returning the value to cache on a miss
+        :return: the cached value
+        """
+        stat = os.stat(path)
+        file_key = (kind, encode_ampersands, os.path.abspath(path))
+        known = self._files.get(file_key)
+        if known is not None and known[:2] == (stat.st_mtime_ns, stat.st_size):
+            value = self._get(known[2], count=False)
+            if value is not _MISSING:
+                return value
+        with open(path, 'rb') as source:
+            content = source.read()
+        key = (kind, False, encode_ampersands, hashlib.blake2b(content, digest_size=16).digest())
+        value = self._get(key)
+        if value is _MISSING:
+            value = parse(content)
+            self._put(key, value, len(content))
+        with self._lock:
+            # only files with a cached entry are remembered (a source larger than the cache never is)
+            if key in self._entries:
+                self._files[file_key] = (stat.st_mtime_ns, stat.st_size, key)
+                self._key_files.setdefault(key, set()).add(file_key)
+            else:
+                self._files.pop(file_key, None)
+        return value
+
+    def stats(self) -> dict:
+        """
+        :return: dict of hits, misses, entries and bytes (source bytes of the cached entries)
+        """
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'entries': len(self._entries), 'bytes': self.size}
+
+    def clear(self) -> None:
+        """ drop every entry and reset the counters """
+        with self._lock:
+            self._entries.clear()
+            self._files.clear()
+            self._key_files.clear()
+            self.size = self.hits = self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
 
 
 class JSON:
     """ simple json class to encapsulate basic json operations """
-    def __init__(self, json_string: str or None = None, encode_ampersands: bool = False):
+    def __init__(self, json_string: str or None = None, encode_ampersands: bool = False,
+                 backend: str or None = None, cache: ParseCache or None = None):
         # data is core python objects (list, dict, object, etc) from the core python JSON.loads
         self.data = None
         self.encode_ampersands = encode_ampersands
+        # json backend for this instance; None follows the global setting (see set_json_backend)
+        self.backend = backend
+        # optional ParseCache; cached data is frozen (FrozenDict/tuple) so use dict()/list() to modify it
+        self.cache = cache
         self.from_json_string(json_string)
 
+    @property
+    def codec(self) -> JSONCodec:
+        """ the JSONCodec currently used by this instance """
+        return get_json_codec(self.backend)
+
     def from_json_string(self, json_string: str):
         """
         read in from json_string
@@ -24,39 +611,355 @@ class JSON:
         :return: self
         """
         if json_string:
-            if self.encode_ampersands:
-                regex = re.compile(r"&(?!amp;|lt;|gt;)")
-                json_string = regex.sub("&amp;", json_string)
-            self.data = json.loads(json_string)
+            if self.cache is not None:
+                self.data = self.cache.parse('json', json_string, self.encode_ampersands,
+                                             lambda: freeze(self._loads(json_string)))
+            else:
+                self.data = self._loads(json_string)
         return self
 
-    def from_json_file(self, json_file_path: str):
+    def _loads(self, json_string: str or bytes):
+        if self.encode_ampersands:
+            json_string = escape_ampersands(json_string)
+        return self.codec.loads(json_string)
+
+    def from_json_file(self, json_file_path: str, mmap_threshold: int = MMAP_THRESHOLD):
         """
         read in from json_file
+        NOTE: the file is parsed as bytes so it is never decoded to a str first; files of at least mmap_threshold bytes
+            are memory mapped and parsed straight from the mapping (backends that can't parse a buffer get one decoded
+            str) instead of being read into a bytes copy
         :param json_file_path: string to file
+        :param mmap_threshold: size in bytes from which the file is memory mapped instead of read
         :return: self
         """
-        with open(json_file_path, encoding='utf-8-sig') as json_file:
-            json_string = json_file.read()
-        if json_string:
-            if self.encode_ampersands:
-                regex = re.compile(r"&(?!amp;|lt;|gt;)")
-                json_string = regex.sub("&amp;", json_string)
-            self.data = json.loads(json_string)
+        if self.cache is not None:
+            self.data = self.cache.parse_file('json', json_file_path, self.encode_ampersands, self._loads_file_bytes)
+            return self
+        with open(json_file_path, 'rb') as json_file:
+            size = os.fstat(json_file.fileno()).st_size
+            if size and size >= mmap_threshold:
+                with _MappedFile(json_file) as mapped:
+                    start = len(codecs.BOM_UTF8) if mapped.buffer[:3] == codecs.BOM_UTF8 else 0
+                    if start < size:
+                        self.data = self._loads_mapped(mapped, start)
+                return self
+            json_bytes = json_file.read()
+        # fast backends don't skip a utf-8 BOM like json.loads does
+        if json_bytes.startswith(codecs.BOM_UTF8):
+            json_bytes = json_bytes[len(codecs.BOM_UTF8):]
+        if json_bytes:
+            self.data = self._loads(json_bytes)
         return self
 
+    def _loads_file_bytes(self, json_bytes: bytes):
+        """ frozen data of a cached json file (None for an empty file) """
+        if json_bytes.startswith(codecs.BOM_UTF8):
+            json_bytes = json_bytes[len(codecs.BOM_UTF8):]
+        return freeze(self._loads(json_bytes)) if json_bytes else None
+
+    def _loads_mapped(self, mapped: _MappedFile, start: int):
+        """ decode the json in a memory mapped file from offset start (after any BOM) """
+        codec = self.codec
+        if self.encode_ampersands and mapped.buffer.find(b"&", start) != -1:
+            # only the escaped copy is built; the mapping is escaped chunk by chunk
+            escaped = bytearray()
+            for chunk in mapped.escaped_chunks(start):
+                escaped += chunk
+            return codec.loads(escaped)
+        with memoryview(mapped.buffer)[start:] as view:
+            if codec.buffers:
+                try:
+                    return codec.loads(view)
+                except _CODEC_ERRORS:
+                    # rejected; decode it below so the standard library gives its usual result or error
+                    pass
+            text = str(view, json.detect_encoding(view[:4].tobytes()), 'surrogatepass')
+        # the decoded str is all the parser needs from here on
+        mapped.release()
+        return codec.loads(text)
+
+    def iter_lines(self, json_file_path: str):
+        """
+        Stream a json lines file (one json value per line) yielding each decoded value; blank lines are skipped
+        :param json_file_path: string to file
+        :return: generator of values
+        """
+        loads = self.codec.loads
+        with open(json_file_path, encoding='utf-8-sig') as json_file:
+            for line in json_file:
+                if line.strip():
+                    if self.encode_ampersands:
+                        line = escape_ampersands(line)
+                    yield loads(line)
+
+    def iter_array(self, json_file_path: str, prefix: str or None = None, read_size: int = DEFAULT_READ_SIZE):
+        """
+        Stream the items of one array in a (large) json file using an incremental decoder over a fixed size read
+        buffer so only one item is in memory at a time
+        Ex: iter_array(path, 'people') for {"people": [...]} or iter_array(path, 'data.items') for nested objects
+        :param json_file_path: string to file
+        :param prefix: dot separated object keys leading to the array; None or '' for a top level array
+        :param read_size: number of chars read from the file at a time
+        :return: generator of array items
+        NOTE: items are decoded with the standard library incremental decoder whatever the backend
+        """
+        keys = prefix.split(".") if prefix else []
+        with open(json_file_path, encoding='utf-8-sig') as json_file:
+            source = _AmpersandEncodingReader(json_file) if self.encode_ampersands else json_file
+            yield from _JSONArrayReader(source, read_size).iter_array(keys)
+
+    def select(self, expression: str):
+        """
+        Lazily select values from data with a query expression (see ubercode.utils.query)
+        Ex: json.select("people[?age>25].firstName")
+        :param expression: query expression
+        :return: generator of matching values
+        """
+        return query.select(expression, self.data)
+
+    def to_json_string(self) -> str:
+        """
+        Encode data as compact json text with json.dumps semantics whichever backend is active (NaN stays NaN and
+        unsupported types like datetime raise TypeError); see write_json for json.dumps formatted output
+        :return: json string
+        """
+        return self.codec.dumps(self.data)
+
+    def write_json(self, path_or_fp, stream: bool = True, indent: int or None = None,
+                   write_size: int = DEFAULT_WRITE_SIZE) -> None:
+        """
+        Write data as json text (same output as json.dumps) to a file path (utf-8) or an open text file object
+        :param path_or_fp: file path or text file object
+        :param stream: encode incrementally and write in write_size chunks so the whole document is never held in
+            memory as one string; False encodes it all with json.dumps and writes it once
+        :param indent: optional json indent
+        :param write_size: number of encoded chars collected before each write when streaming
+        :return: None
+        """
+        json_file, opened = _open_for_write(path_or_fp)
+        try:
+            if not stream:
+                json_file.write(json.dumps(self.data, indent=indent))
+                return
+            chunks = []
+            size = 0
+            for chunk in json.JSONEncoder(indent=indent).iterencode(self.data):
+                chunks.append(chunk)
+                size += len(chunk)
+                if size >= write_size:
+                    json_file.write("".join(chunks))
+                    chunks = []
+                    size = 0
+            json_file.write("".join(chunks))
+        finally:
+            if opened:
+                json_file.close()
+
     def __str__(self):
         return str(self.data)
 
 
+class XMLMapping(Mapping):
+    """
+    Read-only, lazy tree_to_dict() view of an element (see XML.as_mapping).  Keys follow the tree_to_dict()
+    conventions (child tags in document order, then @attributes, then #text) but a child is only converted when it
+    is accessed and each converted child is memoized, so lookups cost time proportional to the parts of the document
+    actually touched.
+    NOTE: repeated tags are returned as tuples instead of lists so the view can't be modified; use to_dict() for a
+        fully converted tree_to_dict() copy
+    """
+    __slots__ = ('_element', '_index', '_cache')
+
+    def __init__(self, element: Etree.Element):
+        self._element = element
+        # key -> child elements with that tag, attribute value or text; built on first access from one level
+        self._index = None
+        self._cache = {}
+
+    @staticmethod
+    def _value(element: Etree.Element):
+        if not len(element):
+            return XML._leaf_to_value(element) if not element.attrib else XMLMapping(element)
+        return XMLMapping(element)
+
+    def _keys(self) -> dict:
+        if self._index is None:
+            index = {}
+            for child in self._element:
+                children = index.get(child.tag)
+                if children is None:
+                    index[child.tag] = [child]
+                else:
+                    children.append(child)
+            for k, v in self._element.attrib.items():
+                self._cache['@' + k] = v
+                index['@' + k] = None
+            text = self._element.text
+            if text:
+                text = text.strip()
+                if text:
+                    self._cache['#text'] = text
+                    index['#text'] = None
+            self._index = index
+        return self._index
+
+    def __getitem__(self, key):
+        try:
+            return self._cache[key]
+        except KeyError:
+            pass
+        children = self._keys()[key]
+        if children is None:
+            # attributes and text are cached when the index is built
+            return self._cache[key]
+        if len(children) == 1:
+            value = self._value(children[0])
+        else:
+            value = tuple(map(self._value, children))
+        self._cache[key] = value
+        return value
+
+    def __iter__(self):
+        return iter(self._keys())
+
+    def __len__(self):
+        return len(self._keys())
+
+    def __contains__(self, key):
+        return key in self._keys()
+
+    def to_dict(self) -> dict:
+        """
+        :return: the fully converted tree_to_dict() value of the element
+        """
+        return XML.tree_to_dict(self._element)[self._element.tag]
+
+    def __repr__(self):
+        return f"XMLMapping(<{self._element.tag}>)"
+
+
+# -------- typed record extraction --------
+# a trailing @attribute or #text step of a schema field path
+_FIELD_TARGET = re.compile(r"(?:^|/)(?:@((?:{[^}]*})?[^/{}\[\]]+)|#text)$")
+
+
+def _field_getter(path: str):
+    """
+    Compile a schema field path into a function returning the field value (str or None) of a record element
+    :param path: ElementPath relative to the record optionally ending in @attribute or #text ('.' is the record)
+    :return: callable(element)
+    """
+    attribute = None
+    match = _FIELD_TARGET.search(path)
+    if match:
+        attribute = match.group(1)
+        path = path[:match.start()]
+    if path in ("", "."):
+        path = None
+    else:
+        try:
+            Etree.Element("validate").find(path)
+        except (SyntaxError, KeyError, TypeError) as e:
+            raise ValueError(f"Invalid field path [{path}]: {e!r}!")
+
+    def get(element):
+        if path is not None:
+            element = element.find(path)
+            if element is None:
+                return None
+        if attribute:
+            return element.get(attribute)
+        text = element.text
+        return text.strip() if text else None
+    return get
+
+
+class XMLSchema:
+    """
+    Declares how to extract typed records from <tag> elements (see XML.extract and XML.iter_extract) straight into
+    compact cursor.record_class() records or cursor.tuple_class() named tuples without building tree_to_dict() dicts.
+    Ex: XMLSchema({'id': ('@id', 'int'), 'name': 'name', 'born': ('dates/born', 'date'), 'city': 'address/city'})
+    Field paths are ElementPaths relative to the record element that may end in @attribute (an attribute value) or
+    #text (the element text, the default); '@id' and '#text' alone refer to the record element itself.  Text is
+    stripped like tree_to_dict() does and fields that don't exist are None (their converter is skipped).
+    """
+    OUTPUTS = ('record', 'frozen', 'tuple')
+
+    def __init__(self, fields: dict, tag: str = 'record', output: str = 'record'):
+        """
+        :param fields: field_name:path or field_name:(path, converter) in field order; a converter is a callable or
+            one of the cursor.CONVERTER_TYPES names (str, int, bool, is_true, none, date)
+        :param tag: tag of the record elements
+        :param output: 'record' (mutable __slots__ records), 'frozen' (immutable records) or 'tuple' (named tuples)
+        """
+        if output not in self.OUTPUTS:
+            raise ValueError(f"Schema output [{output}] must be one of {list(self.OUTPUTS)}!")
+        self.tag = tag
+        self.output = output
+        getters = []
+        for name, spec in fields.items():
+            path, converter = (spec, None) if isinstance(spec, str) else spec
+            if isinstance(converter, str):
+                if converter not in cursor.CONVERTER_TYPES:
+                    raise ValueError(f"Converter type [{converter}] for field [{name}] must be one of "
+                                     f"{list(cursor.CONVERTER_TYPES)}!")
+                converter = cursor.CONVERTER_TYPES[converter]
+            getters.append((_field_getter(path), converter))
+        self._getters = tuple(getters)
+        columns = tuple(fields)
+        # the classes are shared with cursor results that have the same columns
+        self.cls = cursor.tuple_class(columns) if output == 'tuple' else cursor.record_class(columns, output == 'record')
+
+    def extract(self, element: Etree.Element):
+        """
+        :param element: one record element
+        :return: record (or named tuple) of the typed field values
+        """
+        values = []
+        for get, converter in self._getters:
+            value = get(element)
+            if converter is not None and value is not None:
+                value = converter(value)
+            values.append(value)
+        return self.cls(*values)
+
+
 class XML:
     """ simple xml class to encapsulate basic xml operations using build in python ETree """
-    def __init__(self, xml_string: str or None = None, encode_ampersands: bool = False):
-        # data is core python ElementTree object
-        self.data = None
+    def __init__(self, xml_string: str or None = None, encode_ampersands: bool = False,
+                 cache: ParseCache or None = None):
+        # core python ElementTree object (see the data property)
+        self._data = None
+        # True while _data is the tree of a ParseCache entry shared with other instances
+        self._shared = False
         self.encode_ampersands = encode_ampersands
+        # optional ParseCache; loads share the cached tree until data is accessed (see the data property)
+        self.cache = cache
         self.from_xml_string(xml_string)
 
+    @property
+    def data(self) -> Etree.Element or None:
+        """
+        The loaded root element.  A tree loaded through a ParseCache is shared with every instance loaded from the same
+        source and is copied on write: the XML methods read the shared tree directly but the first access to data
+        makes this instance its own copy so a caller can never modify the cached entry.
+        """
+        if self._shared:
+            self._data = copy.deepcopy(self._data)
+            self._shared = False
+        return self._data
+
+    @data.setter
+    def data(self, value: Etree.Element or None):
+        self._data = value
+        self._shared = False
+
+    def _cached(self, tree: Etree.Element):
+        """ use a cached tree (shared until data is accessed) """
+        self._data = tree
+        self._shared = True
+
     def from_xml_string(self, xml_string: str):
         """
         read in from xml_string
@@ -64,66 +967,381 @@ class XML:
         :return: self
         """
         if xml_string:
-            if self.encode_ampersands:
-                regex = re.compile(r"&(?!amp;|lt;|gt;)")
-                xml_string = regex.sub("&amp;", xml_string)
-            self.data = Etree.fromstring(xml_string)
+            if self.cache is not None:
+                self._cached(self.cache.parse('xml', xml_string, self.encode_ampersands,
+                                              lambda: self._fromstring(xml_string)))
+            else:
+                self.data = self._fromstring(xml_string)
         return self
 
-    def from_xml_file(self, xml_file_path: str):
+    def _fromstring(self, xml_string: str or bytes) -> Etree.Element:
+        if self.encode_ampersands:
+            xml_string = escape_ampersands(xml_string)
+        return Etree.fromstring(xml_string)
+
+    def from_xml_file(self, xml_file_path: str, mmap_threshold: int = MMAP_THRESHOLD):
         """
         read in from xml_file
         :param xml_file_path:
+        :param mmap_threshold: size in bytes from which a file that needs ampersand encoding is memory mapped and
+            escaped chunk by chunk into the parser instead of being read and escaped as a whole
         :return: self
         """
-        # if we need to encode load the file replace and then load the etree from string
+        # if we need to encode load the file bytes, replace and then load the etree from the bytes
+        #   note: the parser handles the BOM and declared encoding so the file is never decoded to a str first
+        #   without encoding the parser already reads the file in small chunks so it is never held in memory whole
+        if self.cache is not None:
+            self._cached(self.cache.parse_file('xml', xml_file_path, self.encode_ampersands, self._fromstring))
+            return self
         if self.encode_ampersands:
-            # note: encoding was utf-8-sig
-            with open(xml_file_path, encoding='utf-8') as xml_file:
-                xml_string = xml_file.read()
-                regex = re.compile(r"&(?!amp;|lt;|gt;)")
-                xml_string = regex.sub("&amp;", xml_string)
-                tree = Etree.fromstring(xml_string)
+            with open(xml_file_path, 'rb') as xml_file:
+                size = os.fstat(xml_file.fileno()).st_size
+                if size and size >= mmap_threshold:
+                    parser = Etree.XMLParser()
+                    with _MappedFile(xml_file) as mapped:
+                        for chunk in mapped.escaped_chunks():
+                            parser.feed(chunk)
+                    tree = parser.close()
+                else:
+                    tree = Etree.fromstring(escape_ampersands(xml_file.read()))
         else:
             tree = Etree.parse(xml_file_path)
             tree = tree.getroot()
         self.data = tree
         return self
 
+    def _iter_matches(self, xml_file_path: str, tag: str):
+        """
+        Stream a file with iterparse yielding each outermost <tag> element once it is complete; an element is cleared
+        and removed from its parent when the caller asks for the next one
+        """
+        # bytes are escaped so the parser still handles the BOM and declared encoding
+        xml_file = source = open(xml_file_path, 'rb')
+        if self.encode_ampersands:
+            source = _AmpersandEncodingReader(xml_file)
+        with xml_file:
+            # open elements so a finished element can be removed from its parent
+            parents = []
+            matches = 0
+            for event, element in Etree.iterparse(source, events=('start', 'end')):
+                if event == 'start':
+                    parents.append(element)
+                    if element.tag == tag:
+                        matches += 1
+                    continue
+                parents.pop()
+                if element.tag == tag:
+                    matches -= 1
+                if matches:
+                    continue
+                if element.tag == tag:
+                    yield element
+                element.clear()
+                if parents:
+                    parents[-1].remove(element)
+
+    def iter_elements(self, xml_file_path: str, tag: str = 'record'):
+        """
+        Stream a (large) xml file with iterparse and yield each <tag> element as a tree_to_dict() style dict.  Elements
+        are cleared once processed so memory stays constant no matter how big the file is.
+        NOTE: only the outermost matching elements are yielded (a <tag> nested in another <tag> is part of its dict);
+            use the {namespace}tag form for namespaced elements
+        :param xml_file_path: path to the xml file
+        :param tag: tag of the elements to yield
+        :return: generator of dicts
+        """
+        for element in self._iter_matches(xml_file_path, tag):
+            yield XML.tree_to_dict(element)
+
+    def iter_extract(self, xml_file_path: str, schema: XMLSchema):
+        """
+        Stream a (large) xml file with iterparse and extract each outermost <schema.tag> element into a typed record
+        (see XMLSchema); memory stays constant no matter how big the file is
+        :param xml_file_path: path to the xml file
+        :param schema: XMLSchema
+        :return: generator of records
+        """
+        extract = schema.extract
+        for element in self._iter_matches(xml_file_path, schema.tag):
+            yield extract(element)
+
+    def extract(self, schema: XMLSchema):
+        """
+        Extract each outermost <schema.tag> element of the loaded tree (the root itself if it matches) into a typed
+        record (see XMLSchema)
+        :param schema: XMLSchema
+        :return: generator of records in document order
+        """
+        if self._data is None:
+            return
+        extract = schema.extract
+        stack = [self._data]
+        while stack:
+            element = stack.pop()
+            if element.tag == schema.tag:
+                yield extract(element)
+            else:
+                stack.extend(reversed(element))
+
+    def select(self, expression: str):
+        """
+        Lazily select values from the to_dict() conversion with a query expression (see ubercode.utils.query)
+        Ex: xml.select("contacts.contact[?@attr==1].name")
+        :param expression: query expression
+        :return: generator of matching values
+        """
+        return query.select(expression, self.as_mapping())
+
+    def as_mapping(self) -> Mapping:
+        """
+        Read-only view of the data using the to_dict() conventions where each part of the tree is only converted
+        when it is accessed (see XMLMapping).  Ex: xml.as_mapping()['contacts']['contact'][0]['@attr']
+        :return: Mapping of {root tag: value}
+        """
+        # wrap the root in an unattached parent so the root tag becomes the single top level key
+        document = Etree.Element("document")
+        if self._data is not None:
+            document.append(self._data)
+        return XMLMapping(document)
+
     def to_dict(self) -> dict:
         """
         output to dict
         :return: dict
         """
-        return XML.tree_to_dict(self.data)
+        return XML.tree_to_dict(self._data)
+
+    @staticmethod
+    def _leaf_to_value(t: Etree):
+        """
+        Convert an element without children to its tree_to_dict() value
+        :param t: etree instance without children
+        :return: stripped text (or None) or a dict of @attributes and #text
+        """
+        text = t.text
+        if not t.attrib:
+            return text.strip() if text else None
+        value = {'@' + k: v for k, v in t.attrib.items()}
+        if text:
+            text = text.strip()
+            if text:
+                value['#text'] = text
+        return value
 
     @staticmethod
     def tree_to_dict(t: Etree) -> dict:
         """
         Convert an etree structure to a dictionary of values
+        NOTE: walks the tree with an explicit stack (no recursion limit on deeply nested documents) and fills one dict
+            per element that has children; leaf children are converted inline without a stack frame.  Repeated child
+            tags become a list of values in document order.
         :param t: etree instance
         :return: dictionary of values
         """
-        d = {t.tag: {} if t.attrib else None}
-        children = list(t)
-        if children:
-            dd = defaultdict(list)
-            for dc in map(XML.tree_to_dict, children):
-                for k, v in dc.items():
-                    dd[k].append(v)
-            d = {t.tag: {k: v[0] if len(v) == 1 else v for k, v in dd.items()}}
-        if t.attrib:
-            d[t.tag].update(('@' + k, v) for k, v in t.attrib.items())
-        if t.text:
-            text = t.text.strip()
-            if children or t.attrib:
+        if not len(t):
+            return {t.tag: XML._leaf_to_value(t)}
+        leaf_to_value = XML._leaf_to_value
+        stack = []
+        element, children, value = t, iter(t), {}
+        while True:
+            for child in children:
+                if len(child):
+                    # descend; this element's remaining children are picked up again when the child is finished
+                    stack.append((element, children, value))
+                    element, children, value = child, iter(child), {}
+                    break
+                child_value = leaf_to_value(child)
+                tag = child.tag
+                if tag in value:
+                    # converted values are never lists so an existing list is a group of repeated tags
+                    existing = value[tag]
+                    if type(existing) is list:
+                        existing.append(child_value)
+                    else:
+                        value[tag] = [existing, child_value]
+                else:
+                    value[tag] = child_value
+            else:
+                # every child of element is converted; add its attributes and text then hand it to the parent
+                if element.attrib:
+                    for k, v in element.attrib.items():
+                        value['@' + k] = v
+                text = element.text
                 if text:
-                    d[t.tag]['#text'] = text
+                    text = text.strip()
+                    if text:
+                        value['#text'] = text
+                if not stack:
+                    return {element.tag: value}
+                child_value, tag = value, element.tag
+                element, children, value = stack.pop()
+                if tag in value:
+                    existing = value[tag]
+                    if type(existing) is list:
+                        existing.append(child_value)
+                    else:
+                        value[tag] = [existing, child_value]
+                else:
+                    value[tag] = child_value
+
+    def from_dict(self, d: dict):
+        """
+        read in from a tree_to_dict() style dict (see dict_to_tree)
+        :param d: dict of {root tag: value}
+        :return: self
+        """
+        self.data = XML.dict_to_tree(d)
+        return self
+
+    @staticmethod
+    def dict_to_tree(d: dict) -> Etree.Element:
+        """
+        Convert a tree_to_dict() style dict back into an etree structure (the inverse of tree_to_dict).  A value is None
+        for an empty element, a scalar for its text or a dict of child tags, @attributes and #text; a list value
+        repeats the child tag once per item.
+        NOTE: tree_to_dict groups repeated tags and strips text so documents with interleaved tags or significant
+            whitespace or tail text don't round trip exactly; a tree_to_dict() dict does round trip (dict -> tree ->
+            dict) including '' for a whitespace only leaf, which is written as a single space.  Other dicts come back
+            with their scalars as stripped strings
+        :param d: dict with a single root tag key
+        :return: root etree Element
+        """
+        if not isinstance(d, dict) or len(d) != 1:
+            raise ValueError("dict_to_tree expects a dict with exactly one root tag key!")
+        (tag, value), = d.items()
+        root = Etree.Element(tag)
+        # (element, value to apply to it) pairs; walked with an explicit stack like tree_to_dict
+        stack = [(root, value)]
+        while stack:
+            element, value = stack.pop()
+            if value is None:
+                continue
+            if not isinstance(value, dict):
+                # an empty text node would read back as None so '' (a whitespace only leaf) keeps one space
+                element.text = str(value) or ' '
+                continue
+            children = []
+            for key, child in value.items():
+                if key.startswith('@'):
+                    element.set(key[1:], str(child))
+                elif key == '#text':
+                    element.text = None if child is None else str(child)
+                else:
+                    for item in (child if isinstance(child, list) else (child,)):
+                        children.append((Etree.SubElement(element, key), item))
+            stack.extend(children)
+        return root
+
+    def write_xml(self, path_or_fp, stream: bool = True, encoding: str = 'utf-8',
+                  xml_declaration: bool or None = None) -> None:
+        """
+        Write data as xml to a file path or an open file object
+        :param path_or_fp: file path, binary file object or text file object (text files are written as str)
+        :param stream: serialize incrementally through ElementTree.write which writes small pieces through a
+            buffered writer so the document is never held in memory as one string; False serializes it all with
+            tostring() and writes it once
+        :param encoding: output encoding for paths and binary files
+        :param xml_declaration: add an xml declaration (ElementTree default: only for non utf-8/us-ascii encodings)
+        :return: None
+        """
+        if self._data is None:
+            raise ValueError("No xml data to write!")
+        xml_file, opened = _open_for_write(path_or_fp, binary=True)
+        try:
+            if isinstance(xml_file, io.TextIOBase):
+                encoding = 'unicode'
+            if stream:
+                Etree.ElementTree(self._data).write(xml_file, encoding=encoding, xml_declaration=xml_declaration)
             else:
-                d[t.tag] = text
-        return d
+                xml_file.write(Etree.tostring(self._data, encoding=encoding, xml_declaration=xml_declaration))
+        finally:
+            if opened:
+                xml_file.close()
 
     def __str__(self):
-        if self.data:
-            return Etree.tostring(self.data, encoding='unicode')
+        if self._data:
+            return Etree.tostring(self._data, encoding='unicode')
         return ""
+
+
+# -------- multi-file loading --------
+# number of threads or processes used by load_many
+DEFAULT_LOAD_WORKERS = 4
+LOAD_KINDS = ('json', 'xml')
+LOAD_MODES = {
+    'thread': ThreadPoolExecutor,
+    'process': ProcessPoolExecutor,
+}
+
+# one loaded file: data is the JSON/XML instance (or its dict when to_dict) and error the exception if it failed
+LoadResult = namedtuple('LoadResult', 'path data error')
+
+
+def _load_file(path, kind: str, encode_ampersands: bool, to_dict: bool) -> LoadResult:
+    """ load one file; module level so it can be pickled for process pools """
+    try:
+        if kind == 'json':
+            loaded = JSON(encode_ampersands=encode_ampersands).from_json_file(path)
+            value = loaded.data if to_dict else loaded
+        else:
+            loaded = XML(encode_ampersands=encode_ampersands).from_xml_file(path)
+            value = loaded.to_dict() if to_dict else loaded
+    except Exception as e:
+        return LoadResult(path, None, e)
+    return LoadResult(path, value, None)
+
+
+def load_many(paths, kind: str = 'xml', workers: int = DEFAULT_LOAD_WORKERS, mode: str = 'thread',
+              ordered: bool = True, to_dict: bool = False, encode_ampersands: bool = False):
+    """
+    Load many json or xml files on a pool of worker threads or processes.  A file that fails to load doesn't stop
+    the batch; its LoadResult carries the exception instead.  At most 2 * workers files are in flight at a time so
+    large directories are never queued up front.
+    Ex: for result in load_many(glob.glob("feed/*.xml"), mode='process', to_dict=True): ...
+    :param paths: iterable of file paths
+    :param kind: 'xml' or 'json'
+    :param workers: number of threads or processes; 1 or less loads on the calling thread
+    :param mode: 'thread' (parsing mostly holds the GIL so best for I/O bound loads) or 'process'
+    :param ordered: yield results in input order; False yields them as they complete
+    :param to_dict: convert each file inside the worker (XML.to_dict(), JSON.data) so only plain python values
+        cross process boundaries
+    :param encode_ampersands: encode bare ampersands before parsing each file
+    :return: generator of LoadResult(path, data, error) namedtuples
+    """
+    if kind not in LOAD_KINDS:
+        raise ValueError(f"Load kind [{kind}] must be one of {list(LOAD_KINDS)}!")
+    if mode not in LOAD_MODES:
+        raise ValueError(f"Load mode [{mode}] must be one of {list(LOAD_MODES)}!")
+    # validated above rather than in the generator so bad arguments raise on the call, not on the first next()
+    return _load_many(paths, kind, workers, mode, ordered, to_dict, encode_ampersands)
+
+
+def _load_many(paths, kind: str, workers: int, mode: str, ordered: bool, to_dict: bool, encode_ampersands: bool):
+    """ generator behind load_many; the arguments are already validated """
+    if workers <= 1:
+        for path in paths:
+            yield _load_file(path, kind, encode_ampersands, to_dict)
+        return
+    with LOAD_MODES[mode](max_workers=workers) as pool:
+        pending = deque() if ordered else set()
+        for path in paths:
+            future = pool.submit(_load_file, path, kind, encode_ampersands, to_dict)
+            if ordered:
+                pending.append(future)
+                # yield finished files in order; block on the oldest one if too many are in flight
+                while pending and (pending[0].done() or len(pending) >= workers * 2):
+                    yield pending.popleft().result()
+            else:
+                pending.add(future)
+                if len(pending) >= workers * 2:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield future.result()
+        if ordered:
+            while pending:
+                yield pending.popleft().result()
+        else:
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
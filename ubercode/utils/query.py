@@ -0,0 +1,277 @@
+"""
+A small path query language for navigating loaded json data and xml dicts without hand written nested loops.
+
+Ex: orders[*].items[?qty>2].sku
+
+    name        value of a key (names may contain @ and # so the @attr / #text keys from XML.tree_to_dict work)
+    ['name']    quoted key for names with dots, brackets or spaces
+    *           every value of a dict (ex: people.*)
+    [*]         every item of a list
+    [0] [-1]    one item of a list by position
+    [?a.b>2]    items where the (nested) key compares true against a number, 'string', true, false or null
+                using one of == != > >= < <= ; [?a] keeps items where the key exists and is not None
+
+NOTE: xml dicts only use a list (a tuple for XML.as_mapping) when a tag repeats so anything that isn't a list or tuple
+    is treated as a list of one item by [*], [n] and [?...]; likewise a key applied to a list is applied to each item.
+    Queries are compiled once into a plan of steps (cached by expression string) and evaluated with generators so
+    documents are never copied.
+"""
+import re
+from collections.abc import Mapping
+from functools import lru_cache
+from typing import Any
+
+# number of compiled queries kept; least recently used are dropped
+QUERY_CACHE_SIZE = 256
+
+_NAME = re.compile(r"[^.\[\]\s]+")
+_FILTER_NAME = re.compile(r"[^.\[\]\s=!<>]+")
+_OPERATOR = re.compile(r"==|!=|>=|<=|>|<")
+_NUMBER = re.compile(r"-?\d+(\.\d+)?([eE][+-]?\d+)?")
+_STRING = re.compile(r"'((?:[^'\\]|\\.)*)'|\"((?:[^\"\\]|\\.)*)\"")
+_INDEX = re.compile(r"-?\d+")
+_ESCAPE = re.compile(r"\\(.)")
+_KEYWORDS = {'true': True, 'false': False, 'null': None}
+
+_COMPARISONS = {
+    '==': lambda a, b: a == b,
+    '!=': lambda a, b: a != b,
+    '>': lambda a, b: a > b,
+    '>=': lambda a, b: a >= b,
+    '<': lambda a, b: a < b,
+    '<=': lambda a, b: a <= b,
+}
+
+
+# -------- evaluation steps --------
+# NOTE: each step takes a generator of values and returns a generator of the values it selects from them
+def _items(value):
+    """ list (or tuple) items, or the value itself for anything that isn't a list """
+    if isinstance(value, (list, tuple)):
+        return value
+    return (value,)
+
+
+def _key_step(name: str):
+    def step(values):
+        for value in values:
+            for item in _items(value):
+                if isinstance(item, Mapping) and name in item:
+                    yield item[name]
+    return step
+
+
+def _values_step(values):
+    for value in values:
+        for item in _items(value):
+            if isinstance(item, Mapping):
+                yield from item.values()
+
+
+def _each_step(values):
+    for value in values:
+        yield from _items(value)
+
+
+def _index_step(index: int):
+    def step(values):
+        for value in values:
+            items = _items(value)
+            if -len(items) <= index < len(items):
+                yield items[index]
+    return step
+
+
+def _field(item, names):
+    """ value of a nested key in item or a KeyError if it doesn't exist """
+    for name in names:
+        if not isinstance(item, Mapping) or name not in item:
+            raise KeyError(name)
+        item = item[name]
+    return item
+
+
+def _compare(value, operator: str, literal) -> bool:
+    # xml values are strings so compare them as numbers when the literal is a number
+    if isinstance(literal, (int, float)) and not isinstance(literal, bool) and isinstance(value, str):
+        try:
+            value = float(value)
+        except ValueError:
+            return operator == '!='
+    try:
+        return bool(_COMPARISONS[operator](value, literal))
+    except TypeError:
+        return False
+
+
+def _filter_step(names: tuple, operator: str or None, literal):
+    def step(values):
+        for value in values:
+            for item in _items(value):
+                try:
+                    field = _field(item, names)
+                except KeyError:
+                    continue
+                if operator is None:
+                    if field is not None:
+                        yield item
+                elif _compare(field, operator, literal):
+                    yield item
+    return step
+
+
+# -------- compiler --------
+class _Parser:
+    """ turns an expression string into a tuple of evaluation steps """
+    def __init__(self, expression: str):
+        self.expression = expression
+        self.position = 0
+
+    def error(self, message: str) -> ValueError:
+        return ValueError(f"Invalid query [{self.expression}] at position {self.position}: {message}!")
+
+    def skip_whitespace(self) -> None:
+        while self.position < len(self.expression) and self.expression[self.position].isspace():
+            self.position += 1
+
+    def match(self, regex):
+        match = regex.match(self.expression, self.position)
+        if match:
+            self.position = match.end()
+        return match
+
+    def accept(self, text: str) -> bool:
+        if self.expression.startswith(text, self.position):
+            self.position += len(text)
+            return True
+        return False
+
+    def name(self):
+        if self.accept("*"):
+            return _values_step
+        match = self.match(_NAME)
+        if not match:
+            raise self.error("expected a key name")
+        return _key_step(match.group())
+
+    def literal(self):
+        self.skip_whitespace()
+        match = self.match(_STRING)
+        if match:
+            text = match.group(1) if match.group(1) is not None else match.group(2)
+            return _ESCAPE.sub(r"\1", text)
+        match = self.match(_NUMBER)
+        if match:
+            return float(match.group()) if match.group(1) or match.group(2) else int(match.group())
+        for keyword, value in _KEYWORDS.items():
+            if self.accept(keyword):
+                return value
+        raise self.error("expected a number, quoted string, true, false or null")
+
+    def selector(self):
+        self.skip_whitespace()
+        if self.accept("*"):
+            return _each_step
+        if self.accept("?"):
+            names = []
+            while True:
+                self.skip_whitespace()
+                match = self.match(_FILTER_NAME)
+                if not match:
+                    raise self.error("expected a key name in filter")
+                names.append(match.group())
+                if not self.accept("."):
+                    break
+            self.skip_whitespace()
+            match = self.match(_OPERATOR)
+            if not match:
+                return _filter_step(tuple(names), None, None)
+            return _filter_step(tuple(names), match.group(), self.literal())
+        match = self.match(_STRING)
+        if match:
+            text = match.group(1) if match.group(1) is not None else match.group(2)
+            return _key_step(_ESCAPE.sub(r"\1", text))
+        match = self.match(_INDEX)
+        if match:
+            return _index_step(int(match.group()))
+        raise self.error("expected *, ?filter, a quoted key or an index")
+
+    def parse(self) -> tuple:
+        steps = []
+        self.skip_whitespace()
+        # an optional leading $ refers to the document itself
+        if self.accept("$"):
+            if self.accept("."):
+                steps.append(self.name())
+        elif self.position < len(self.expression) and self.expression[self.position] != "[":
+            steps.append(self.name())
+        while self.position < len(self.expression):
+            if self.accept("."):
+                steps.append(self.name())
+            elif self.accept("["):
+                steps.append(self.selector())
+                self.skip_whitespace()
+                if not self.accept("]"):
+                    raise self.error("expected ]")
+            else:
+                raise self.error("expected . or [")
+        return tuple(steps)
+
+
+class Query:
+    """ a compiled query; reuse it (or call compile()) to skip parsing the expression again """
+    def __init__(self, expression: str):
+        self.expression = expression
+        self.steps = _Parser(expression).parse()
+
+    def select(self, data: Any):
+        """
+        Lazily select the values matching the query
+        :param data: json data, a tree_to_dict() dict or any nested dicts/lists
+        :return: generator of matching values (the values themselves; nothing is copied)
+        """
+        values = iter((data,))
+        for step in self.steps:
+            values = step(values)
+        return values
+
+    def first(self, data: Any, default: Any = None) -> Any:
+        """
+        :param data: json data, a tree_to_dict() dict or any nested dicts/lists
+        :param default: value returned when nothing matches
+        :return: the first matching value or default
+        """
+        return next(self.select(data), default)
+
+    def __repr__(self):
+        return f"Query({self.expression!r})"
+
+
+@lru_cache(maxsize=QUERY_CACHE_SIZE)
+def compile(expression: str) -> Query:
+    """
+    Compile a query expression into a reusable Query; compiled queries are cached by expression string
+    :param expression: query expression (see module docs)
+    :return: Query
+    """
+    return Query(expression)
+
+
+def select(expression: str, data: Any):
+    """
+    Lazily select the values matching a query expression
+    :param expression: query expression (see module docs)
+    :param data: json data, a tree_to_dict() dict or any nested dicts/lists
+    :return: generator of matching values
+    """
+    return compile(expression).select(data)
+
+
+def first(expression: str, data: Any, default: Any = None) -> Any:
+    """
+    :param expression: query expression (see module docs)
+    :param data: json data, a tree_to_dict() dict or any nested dicts/lists
+    :param default: value returned when nothing matches
+    :return: the first value matching a query expression or default
+    """
+    return compile(expression).first(data, default)